@@ -3,6 +3,8 @@ from typing import Type, List, Optional
 import json
 from agents import Agent
 from colorama import Fore, Back, Style
+from prompts.registry import render_prompt
+from prompts.VectorPrompts import few_shot_examples
 
 class AgentNetwork:
     def __init__(
@@ -13,6 +15,7 @@ class AgentNetwork:
         description: str = "A network of agents working together to perform tasks.",
         task: str = "question or task for the agent network",
         verbose: bool = False,  # New parameter for debugging output
+        example_tokens: int = 120,
     ) -> None:
         """
         Initialize the AgentNetwork with the given parameters.
@@ -24,6 +27,7 @@ class AgentNetwork:
             description (str): The description of the agent network.
             task (str): The task to perform.
             verbose (bool): Whether to enable verbose logging.
+            example_tokens (int): Token budget of the few-shot examples picked for the task.
         """
         self.llm = llm
         self.agents = agents
@@ -31,6 +35,11 @@ class AgentNetwork:
         self.description = description
         self.task_to_do = task
         self.verbose = verbose
+        self.example_tokens = example_tokens
+        self.agents_info = "\n".join([
+            f"Agent Name: {agent.name} - {agent.description}"
+            for agent in self.agents
+        ])
 
         self.llm.__init__(
             system_prompt=f"""
@@ -40,11 +49,6 @@ You are {self.name}, {self.description}.
 
     def _run_agents(self, task) -> str:
         """Handles tasks that require using multiple agents."""
-        self.agents_info = "\n".join([
-            f"Agent Name: {agent.name} - {agent.description}"
-            for agent in self.agents
-        ])
-
         response = self.llm.run(task).strip()
         if self.verbose:
             print(f"{Fore.YELLOW}Raw Network LLM Response:{Style.RESET_ALL} {response}")
@@ -94,58 +98,19 @@ You are {self.name}, {self.description}.
     def run(self) -> str:
         """Main execution logic of the agent network."""
         self.llm.__init__(
-            system_prompt=f"""
-You are an AI assistant designed to coordinate multiple agents to perform tasks.
-
-***Your task is to understand the given agents, their descriptions, and use them appropriately in your responses.***
-
-***Available Agents:***
-{self.agents_info}
-
-***Instructions:***
-1. Read the task description carefully.
-2. Identify the required agents for the task.
-3. Replace the placeholders in the JSON structure with the actual values provided in the task.
-4. Always respond in the exact same JSON structure format with the agent_name and task description, nothing else.
-
-***JSON Structure:***
-{{
-    "agent_calling": [
-        {{
-            "agent_name": "name of the agent, give the exact name as provided because it is case sensitive; <agent_name>",
-            "task_description": "understand the agent's task and then give the suitable word or sentence accordingly; <task_description>"
-        }}
-    ]
-}}
-
-***Example Task:***
-- Note this is just an example it is not necessary that you are having the same agents provided. Provided Agents are mentioned above.
-Task: Get the weather for New York and write a report about it.
-You:
-{{
-    "agent_calling": [
-        {{
-            "agent_name": "web_surfer",
-            "task_description": "Get the weather for New York"
-        }}
-    ]
-}}
-
-Compiler: gives info to you like `Agent(web_surfer): <info>`
-
-You again:
-{{
-    "agent_calling": [
-        {{
-            "agent_name": "writer",
-            "task_description": "write a report on the weather of new york here is the data:\n <info>"
-        }}
-    ]
-}}
-
-
-""")
-        response = self._run_agents()
+            system_prompt=render_prompt(
+                "network/coordinator",
+                agents=self.agents_info,
+                examples=few_shot_examples(
+                    "network", self.task_to_do, token_budget=self.example_tokens,
+                    available=[agent.name for agent in self.agents],
+                    header=(
+                        "***Example Tasks:***\n- Note these are just examples, it is not necessary that you "
+                        "are having the same agents provided. Provided Agents are mentioned above."
+                    ),
+                ),
+            ))
+        response = self._run_agents(self.task_to_do)
 
         try:
             summary = self.llm.run(f"[QUERY]\n{self.task_to_do}\n\n[Agent({self.agent_name})]\n{response}")
@@ -6,6 +6,7 @@ from tools import StockMarketInfo
 class StockInfo:
     def __init__(self, llm: Type[Gemini]):
         self.llm = llm
+        self.info = StockMarketInfo()  # shared so its Ticker cache outlives a single run
         # Set the system prompt when initializing the LLM
         self.llm.__init__(system_prompt="""
         You are an AI agent designed to give ticker to search on the stock market. 
@@ -49,8 +50,7 @@ class StockInfo:
                 response = response[7:-3].strip()
             action = json.loads(response)
             query = action['calling']['ticker']
-            info = StockMarketInfo()
-            result = info.get_stock_details(query)
+            result = self.info.get_stock_details(query, compact=True)
             return result
 
         except:
@@ -67,6 +67,8 @@ class StockAnalyst:
         
         ## Instructions:
         - Identify and prioritize the most important information from the stock results.
+        - Base the assessment on the "Technical Signals" line: trend (price vs SMA20/50/200),
+          momentum (RSI14, MACD histogram), volatility (Bollinger width, ATR) and risk (drawdown).
         - Provide a concise summary, aiming for around 100 words or less. 
         - Do not include any URLs or links in your response.
         - Only provide information that is directly present in the stock detail.
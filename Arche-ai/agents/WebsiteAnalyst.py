@@ -1,16 +1,29 @@
 from llms import Gemini  # Assuming you have defined this for your LLM
 from tools import HTMLContentScraper # Assuming this is your previous class
-from typing import Type
+from typing import Type, Optional
+from utils.chunking import select_passages, format_passages
+from utils.tokens import count_tokens
+
+# Used to rank passages when no question about the website is given
+DEFAULT_QUERY = "about purpose overview what we do products services features offers pricing mission"
 
 class WEBAnalyst:
-    def __init__(self, url: str, llm: Type[Gemini]):
+    def __init__(self, url: str, llm: Type[Gemini], token_budget: int = 2000):
+        """
+        Args:
+            url (str): The website to analyze.
+            llm (Type[Gemini]): The language model to use.
+            token_budget (int, optional): Maximum tokens of page content sent to the model. Larger pages
+                                          are reduced to their passages most relevant to the query.
+        """
         self.url = url
         self.llm = llm
+        self.token_budget = token_budget
         self.scraper = HTMLContentScraper() # Create instance of HTMLContentScraper
 
         self.llm.__init__(system_prompt="""
-        You are a Website Analyst AI. Your job is to analyze website code 
-        and provide a concise summary of the website's purpose and content. 
+        You are a Website Analyst AI. Your job is to analyze the extracted text
+        of a website (in markdown) and provide a concise summary of the website's purpose and content. 
 
         ## Instructions:
         - Focus on understanding what the website is about and what it offers.
@@ -19,18 +32,32 @@ class WEBAnalyst:
         - Do not include URLs, links, or HTML tags in your response.
         
         ## Example:
-        Website code: (HTML code of a website)
+        Website content: (markdown text of a website)
         Summary: This website appears to be an online store selling handcrafted jewelry. 
                   It highlights its unique designs, use of natural materials, and secure online shopping experience. 
 
-        Remember: Provide a clear and informative summary based on the provided code. 
+        Remember: Provide a clear and informative summary based on the provided content. 
         """)
 
-    def run(self) -> str:
-        html_content = self.scraper.scrape_and_clean_html(self.url) # Scrape HTML
-        if html_content:
-            self.llm.add_message("user", f"Analyze this website HTML:\n```html\n{html_content}\n```")
-            response = self.llm.run("Provide a concise summary of the website based on the HTML code.")
+    def _relevant_content(self, content: str, query: Optional[str]) -> str:
+        """Keeps the page whole if it fits the budget, otherwise only its top passages (with offsets)."""
+        if count_tokens(content) <= self.token_budget:
+            return content
+        passages = select_passages(content, query or DEFAULT_QUERY, token_budget=self.token_budget)
+        return format_passages(passages)
+
+    def run(self, query: Optional[str] = None) -> str:
+        """
+        Summarizes the website, or answers `query` about it.
+        """
+        content = self.scraper.extract_text(self.url) # Main content as markdown, no markup
+        if content:
+            content = self._relevant_content(content, query)
+            self.llm.add_message("user", f"Analyze this website content:\n{content}")
+            if query:
+                response = self.llm.run(f"Based on the website content, answer concisely: {query}")
+            else:
+                response = self.llm.run("Provide a concise summary of the website based on its content.")
             return response
         else:
             return "Unable to fetch and analyze the website content." 
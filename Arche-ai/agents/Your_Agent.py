@@ -1,9 +1,18 @@
 from llms import GroqLLM
-from tools import OwnTool
+from tools import OwnTool, ToolIndex
 from typing import Type, List, Optional
+import ast
 import json
 from colorama import Fore, Back, Style
 import concurrent.futures
+from agents.summarizer import summarize_results
+from prompts.registry import render_prompt
+from prompts.VectorPrompts import few_shot_examples
+from utils.tokens import count_tokens
+
+SCHEMA_FORMATS = ("signature", "json", "repr")
+# Keys of a parameter spec that the signature itself already shows
+_SPEC_KEYS = {"type", "default", "required", "options"}
 
 def convert_function(func_name, description, **params):
     """Converts function info to a JSON function schema."""
@@ -22,7 +31,9 @@ def convert_function(func_name, description, **params):
     }
 
     for param_name, param_info in params.items():
-        
+        if isinstance(param_info, dict):
+            param_info = dict(param_info)  # keep the tool's own params untouched
+
         try:
             if "description" not in param_info:
                 param_info["description"] = f"Description for {param_name} is missing. Defaulting to {param_info}"
@@ -67,6 +78,80 @@ def convert_function(func_name, description, **params):
 
     return function_dict
 
+def _param_note(param_name, description):
+    """
+    The part of a parameter description worth showing the planner: the description itself, or,
+    for the placeholder `convert_function` writes when there is none, the raw parameter info.
+    """
+    if f"Description for {param_name} is missing" not in description:
+        return description
+    try:
+        info = ast.literal_eval(description)
+    except (ValueError, SyntaxError):
+        return description
+    if not isinstance(info, dict):
+        return description
+    info = {key: value for key, value in info.items() if key != "description" and key not in _SPEC_KEYS}
+    return json.dumps(info, ensure_ascii=False, default=str) if info else ""
+
+def function_signature(function_dict):
+    """
+    Converts a function schema to a one-line signature, e.g.
+    `get_weather(location: string, units?: enum[metric|imperial]="metric") - Current weather. location: City name`.
+    When a parameter has no description, its raw info is shown instead (minus what the signature already says).
+
+    Every parameter style the tools use keeps what the planner needs:
+
+    >>> function_signature(convert_function("get_weather", "Current weather.", params="location:str"))
+    'get_weather(params: string) - Current weather. params: location:str'
+    >>> function_signature(convert_function("get_current_time", "Current time.", params=None))
+    'get_current_time() - Current time.'
+    >>> function_signature(convert_function("ex", "Example tool", params={"query": {"type": "string", "description": "The query"}}))
+    'ex(params?: string) - Example tool. params: {"query": {"type": "string", "description": "The query"}}'
+    >>> function_signature(convert_function("search", "Web search", query={"type": "string", "description": "Search terms", "required": True}, limit={"type": "integer", "default": 5}))
+    'search(query: string, limit?: integer=5) - Web search. query: Search terms'
+    """
+    function = function_dict["function"]
+    parameters = function["parameters"]
+    required = set(parameters["required"])
+    args, notes = [], []
+    for param_name, prop in parameters["properties"].items():
+        description = str(prop.get("description", ""))
+        if description == "None":  # tool declared with params=None
+            continue
+        param_type = prop["type"]
+        if param_type == "enum":
+            param_type = "enum[" + "|".join(str(option) for option in prop["enum"]) + "]"
+        arg = f"{param_name}{'' if param_name in required else '?'}: {param_type}"
+        if "default" in prop:
+            arg += f"={json.dumps(prop['default'])}"
+        args.append(arg)
+        note = _param_note(param_name, description)
+        if note:
+            notes.append(f"{param_name}: {note}")
+
+    signature = f"{function['name']}({', '.join(args)}) - {function['description']}"
+    if notes:
+        signature = signature.rstrip(".") + ". " + "; ".join(notes)
+    return signature
+
+def serialize_functions(functions, schema_format="signature"):
+    """
+    Serializes function schemas for a prompt.
+
+    Args:
+        functions (list): Schemas built by `convert_function`.
+        schema_format (str, optional): "signature" (one line per tool, the most compact),
+                                       "json" (minified JSON schemas) or "repr" (Python repr, the old format).
+    """
+    if schema_format == "signature":
+        return "\n".join(function_signature(function) for function in functions)
+    if schema_format == "json":
+        return json.dumps(functions, separators=(",", ":"), ensure_ascii=False)
+    if schema_format == "repr":
+        return str(functions)
+    raise ValueError(f"Unknown schema format '{schema_format}'. Use one of {SCHEMA_FORMATS}.")
+
 class Agent:
     def __init__(
         self,
@@ -77,6 +162,11 @@ class Agent:
         sample_output: str = "Concise and informative text.",
         task: str = "Ask me a question or give me a task.",
         verbose: bool = False,
+        result_token_budget: int = 3000,
+        schema_format: str = "signature",
+        max_tools: Optional[int] = None,
+        example_tokens: int = 120,
+        min_tool_score: float = 0.15,
     ) -> None:
         self.llm = llm
         self.tools = tools
@@ -85,6 +175,16 @@ class Agent:
         self.sample_output = sample_output
         self.task_to_do = task
         self.verbose = verbose
+        # Tool outputs above this many tokens are map-reduce summarized before the final answer
+        self.result_token_budget = result_token_budget
+        # How tool schemas are written into the planning prompt (see `serialize_functions`)
+        self.schema_format = schema_format
+        # With more tools than this, only the `max_tools` most relevant to the task are shown to the planner
+        self.max_tools = max_tools
+        # Tools less similar than this to the task are not shown, even if fewer than `max_tools` remain
+        self.min_tool_score = min_tool_score
+        # Token budget of the few-shot examples picked for each task (see `prompts.VectorPrompts`)
+        self.example_tokens = example_tokens
 
         self.llm.__init__(system_prompt=f"You are {self.name}, {self.description}.")
         
@@ -93,88 +193,54 @@ class Agent:
         for i in self.tools:
             x = convert_function(func_name=i.func.__name__, description=i.description, **i.params)
             self.all_functions.append(x)
+        # Serialized once per tool set; the prompt registry caches the prompts built from it
+        self.functions_text = serialize_functions(self.all_functions, self.schema_format)
+        self.schema_tokens = count_tokens(self.functions_text)
+        self.tool_descriptions = {tool.func.__name__: tool.description for tool in self.tools}
+
+        self.tool_index = None
+        if self.max_tools and len(self.tools) > self.max_tools:
+            self.tool_index = ToolIndex(self.tools)
+            self._function_of = {id(tool): function for tool, function in zip(self.tools, self.all_functions)}
+
+    def _functions_for(self, task: str) -> tuple[str, list]:
+        """
+        Serialized schemas and names of the tools the planner sees for a task: all of them, or the top `max_tools`.
+        """
+        if self.tool_index is None:
+            return self.functions_text, list(self.tool_descriptions)
+        selected = self.tool_index.top_k(task, k=self.max_tools, min_score=self.min_tool_score)
+        if self.verbose:
+            print(f"{Fore.YELLOW}Selected tools:{Style.RESET_ALL} {[tool.func.__name__ for tool in selected]}")
+        functions = [self._function_of[id(tool)] for tool in selected]
+        return serialize_functions(functions, self.schema_format), [tool.func.__name__ for tool in selected]
+
+    def _used_tools_text(self, results) -> str:
+        """Names and descriptions of the tools that produced results; the summary needs no schemas."""
+        return "\n".join(
+            f"{name} - {self.tool_descriptions[name]}" for name in results if name in self.tool_descriptions
+        )
 
     def _run_no_tool(self) -> str:
         """Handles tasks without any tools."""
-        self.llm.__init__(system_prompt=f"""
-You are {self.name}, {self.description}.
-
-### OUTPUT STYLE:
-{self.sample_output}
-
-***If output style not mentioned, generate in markdown format.***
-""")
+        self.llm.__init__(system_prompt=render_prompt(
+            "agent/no_tool", name=self.name, description=self.description, sample_output=self.sample_output
+        ))
         return self.llm.run(self.task_to_do)
 
     def _run_with_tools(self) -> str:
         """Handles tasks that require using tools."""
-        self.tools_info = "\n".join([
-            f"Tool Name: {tool.func.__name__} - {tool.description}\nTool Parameters: {tool.params}"
-            for tool in self.tools
-        ])
-
-        self.llm.__init__(system_prompt=f"""
-You are an AI assistant designed to generate JSON responses based on provided tools.
-
-Your task is to understand the tools, their parameters, and use them appropriately.
-
-Available Tools:
-llm_tool - A default tool that provides AI-generated text responses.
-{self.all_functions}
-
-Instructions:
-1. Read the task carefully.
-2. Identify the required tool parameters.
-3. Respond with a JSON object containing the tool_name and parameter.
-4. Only provide the JSON response.
-
-JSON Structure:
-{{
-    "func_calling": [
-        {{
-            "tool_name": "<tool_name>",
-            "parameter": "<tool_params>"
-        }}
-    ]
-}}
-
-Example:
-Task: Get the weather for New York
-Response:
-{{
-    "func_calling": [
-        {{
-            "tool_name": "weather_tool",
-            "parameter": "New York"
-        }}
-    ]
-}}
-
-For tools with no parameters:
-{{
-    "func_calling": [
-        {{
-            "tool_name": "time_tool",
-            "parameter": ""
-        }}
-    ]
-}}
-
-Conversation with llm_tool:
-
-Example:
-User: Who are you?
-Response:
-{{
-    "func_calling": [
-        {{
-            "tool_name": "llm_tool",
-            "parameter": "Who are you?"
-        }}
-    ]
-}}
-""")
+        functions_text, tool_names = self._functions_for(self.task_to_do)
+        examples = few_shot_examples(
+            "agent", self.task_to_do, token_budget=self.example_tokens, available=tool_names + ["llm_tool"],
+            header="Examples:",
+        )
+        planner_prompt = render_prompt("agent/planner", functions=functions_text, examples=examples)
+        self.llm.__init__(system_prompt=planner_prompt)
+        if self.verbose:
+            print(f"{Fore.YELLOW}Planning prompt:{Style.RESET_ALL} {planner_prompt.tokens} tokens ({count_tokens(functions_text)} for tool schemas)")
 
+        results = {}
         response = self.llm.run(self.task_to_do).strip()
         if self.verbose:
             print(f"{Fore.YELLOW}Raw LLM Response:{Style.RESET_ALL} {response}")
@@ -184,7 +250,6 @@ Response:
                 response = response[7:-3].strip()
             action = json.loads(response)
 
-            results = {}
             with concurrent.futures.ThreadPoolExecutor() as executor:
                 future_to_tool = {
                     executor.submit(self._call_tool, call): call for call in action.get("func_calling", [])
@@ -217,25 +282,13 @@ Response:
             pass
 
         # Summarization Prompt
-        self.llm.__init__( system_prompt=f"""
-You are {self.name} an AI agent. You are provided with Output from the tools in JSON format, so your task is to use information
-from them and give the best possible answer to the query. Reply in ChatGPT style and only in text and to the point and use simple words. Do not reply in JSON.
-
-### TOOLS:
-llm_tool - If this tool is use than you have to answer users query in best possible way.,
-{self.all_functions}
-
-### OUTPUT STYLE:
-{self.sample_output}
-
-##Instructions:
-- If output style is not mentioned clearly just reply in the best possible way.
-
-***Remember: Your responses should be in text form only and not JSON or any other format.***
-""")
+        self.llm.__init__( system_prompt=render_prompt(
+            "agent/summary", name=self.name, functions=self._used_tools_text(results), sample_output=self.sample_output
+        ))
 
         try:
-            summary = self.llm.run(f"[QUERY]\n{self.task_to_do}\n\n[TOOLS]\n{results}")
+            tool_results = summarize_results(self.llm, self.task_to_do, results, token_budget=self.result_token_budget)
+            summary = self.llm.run(f"[QUERY]\n{self.task_to_do}\n\n[TOOLS]\n{tool_results}")
             if self.verbose:
                 print("Final Response:")
                 print(summary)
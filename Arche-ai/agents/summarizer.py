@@ -0,0 +1,113 @@
+import concurrent.futures
+from typing import Any, Dict
+
+from llms import fork_llm
+from utils.chunking import chunk_text, select_passages
+from utils.tokens import count_tokens
+
+MAP_PROMPT = """
+You are a precise research assistant. You receive one excerpt of a tool output and a user query.
+Extract every fact, number, name and date from the excerpt that helps answer the query.
+Reply with short bullet points only. If nothing in the excerpt is relevant, reply with "NONE".
+"""
+
+REDUCE_PROMPT = """
+You are a precise research assistant. You receive partial notes taken from a tool output and a user query.
+Merge them into one set of short bullet points, removing duplicates and keeping every relevant fact, number, name and date.
+"""
+
+
+def _run_parallel(llm, system_prompt: str, prompts: list, max_workers: int) -> list:
+    """Runs one prompt per forked LLM instance, in parallel, preserving order."""
+    def call(prompt):
+        try:
+            return fork_llm(llm, system_prompt=system_prompt).run(prompt).strip()
+        except Exception as e:
+            return f"Failed to summarize: {e}"
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, prompts))
+
+
+def _reduce(llm, query: str, notes: list, budget: int, chunk_tokens: int, max_workers: int, max_rounds: int = 3) -> str:
+    """Merges notes in parallel batches until they fit the budget."""
+    notes = [note for note in notes if note and note.strip().upper() != "NONE"]
+    for _ in range(max_rounds):
+        merged = "\n".join(notes)
+        if count_tokens(merged) <= budget or len(notes) <= 1:
+            return merged
+
+        batches, batch, used = [], [], 0
+        for note in notes:
+            tokens = count_tokens(note)
+            if batch and used + tokens > chunk_tokens:
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(note)
+            used += tokens
+        batches.append(batch)
+        prompts = [f"[QUERY]\n{query}\n\n[NOTES]\n" + "\n".join(batch) for batch in batches]
+        notes = _run_parallel(llm, REDUCE_PROMPT, prompts, max_workers)
+    return "\n".join(notes)
+
+
+def summarize_results(
+    llm,
+    query: str,
+    results: Dict[str, Any],
+    token_budget: int = 3000,
+    chunk_tokens: int = 1500,
+    max_chunks: int = 16,
+    max_workers: int = 8,
+) -> str:
+    """
+    Shrinks tool outputs to a token budget with a parallel map-reduce over forked LLM calls.
+
+    Outputs that fit their share of the budget are kept verbatim. Larger ones are split
+    into chunks (at most `max_chunks` per output, the ones most relevant to the query),
+    each chunk is summarized against the query in parallel (map), and the chunk notes are
+    merged in parallel batches until they fit (reduce). The number of sequential LLM
+    rounds is bounded, so latency does not grow with the size of the outputs.
+
+    Args:
+        llm: The agent's LLM; calls are made on independent forks of it.
+        query (str): The task the outputs should answer.
+        results (dict): Tool name -> tool output.
+        token_budget (int, optional): Maximum tokens of the returned text.
+        chunk_tokens (int, optional): Size of a map chunk.
+        max_chunks (int, optional): Maximum chunks mapped per output.
+        max_workers (int, optional): Maximum concurrent LLM calls.
+
+    Returns:
+        str: The outputs, one "[tool_name]" section each, within about `token_budget` tokens.
+    """
+    outputs = {name: output if isinstance(output, str) else str(output) for name, output in results.items()}
+    if not outputs or count_tokens("\n".join(outputs.values())) <= token_budget:
+        return "\n\n".join(f"[{name}]\n{output}" for name, output in outputs.items())
+
+    share = max(token_budget // len(outputs), 1)
+    sections, jobs = {}, []
+    for name, output in outputs.items():
+        if count_tokens(output) <= share:
+            sections[name] = output
+            continue
+        chunks = chunk_text(output, max_tokens=chunk_tokens)
+        if len(chunks) > max_chunks:
+            chunks = select_passages(output, query, token_budget=chunk_tokens * max_chunks,
+                                     k=max_chunks, max_tokens=chunk_tokens)
+        jobs.extend((name, chunk["text"]) for chunk in chunks)
+
+    prompts = [f"[QUERY]\n{query}\n\n[TOOL OUTPUT EXCERPT: {name}]\n{text}" for name, text in jobs]
+    notes = {}
+    for (name, _), note in zip(jobs, _run_parallel(llm, MAP_PROMPT, prompts, max_workers)):
+        notes.setdefault(name, []).append(note)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(notes), 1)) as executor:
+        futures = {
+            name: executor.submit(_reduce, llm, query, tool_notes, share, chunk_tokens, max_workers)
+            for name, tool_notes in notes.items()
+        }
+        for name, future in futures.items():
+            sections[name] = future.result() or "No relevant information found."
+
+    return "\n\n".join(f"[{name}]\n{sections[name]}" for name in outputs)
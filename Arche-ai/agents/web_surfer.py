@@ -1,15 +1,15 @@
 import json
-from llms import GroqLLM
-from typing import Type
-from tools import web_search
+import concurrent.futures
+from urllib.parse import urldefrag
+from llms import GroqLLM, fork_llm
+from typing import Iterable, List, Optional, Type
+from tools import web_search, multi_search, HTMLContentScraper
+from utils.chunking import select_passages, format_passages
+from utils.tokens import count_tokens
 
-class DATA_:
-    def __init__(self, llm: Type[GroqLLM]):
-        self.llm = llm
-        # Set the system prompt when initializing the LLM
-        self.llm.__init__(system_prompt="""
-        You are an AI agent designed to give queries to search on the web. 
-        You are incredible at designing a crisp and accurate query. 
+QUERY_PROMPT = """
+        You are an AI agent designed to give queries to search on the web.
+        You are incredible at designing a crisp and accurate query.
 
         Here's how to provide query for doing the web_search:
 
@@ -21,25 +21,56 @@ class DATA_:
             }
         }
 
-        ***Always respond in a concise manner. Always return a JSON object as described above. ***""")
+        ***Always respond in a concise manner. Always return a JSON object as described above. ***"""
 
-    def run(self, user_query: str) -> str:
+SUMMARY_PROMPT = """
+        You are a WebSurfer, an AI agent designed to interact with the web.
+        Your work is to summarize the web results provided to you.
+
+        ## Instructions:
+        - Identify and prioritize the most important information from the web results.
+        - Provide a concise summary, aiming for around 100 words or less.
+        - Do not include any URLs or links in your response.
+        - Only provide information that is directly present in the web results.
+
+        ## Example:
+        **Web Results:** (Some lengthy web search results)
+        **Summary:** [summarized information in crisp and short].
+
+        ***Remember: Your responses should be in text form only and not JSON or any other format.***"""
+
+PAGE_PROMPT = """
+        You are a precise research assistant. You receive the content of one web page and a user query.
+        Extract the facts, numbers, names and dates from the page that help answer the query.
+        Reply with short bullet points only. If nothing on the page is relevant, reply with "NONE".
+        Do not include any URLs or links in your response."""
+
+class DATA_:
+    def __init__(self, llm: Type[GroqLLM]):
+        # Own instance, so this prompt does not overwrite the caller's system prompt
+        self.llm = fork_llm(llm, system_prompt=QUERY_PROMPT)
+
+    def write_query(self, user_query: str) -> str:
         """
-        Executes the main loop of the WebSurfer agent.
+        Asks the LLM for a web search query and returns it.
         """
         response = self.llm.run(user_query)
-        
+
         # Ensure we strip any extraneous whitespace and newlines
         response = response.strip()
 
-        # print("Raw response from LLM:", response)  # Debugging: print raw response
+        # Ensure the response is valid JSON
+        if response.startswith("```json") and response.endswith("```"):
+            response = response[7:-3].strip()
+        action = json.loads(response)
+        return action['calling']['query']
 
+    def run(self, user_query: str) -> str:
+        """
+        Executes the main loop of the WebSurfer agent.
+        """
         try:
-            # Ensure the response is valid JSON
-            if response.startswith("```json") and response.endswith("```"):
-                response = response[7:-3].strip()
-            action = json.loads(response)
-            query = action['calling']['query']
+            query = self.write_query(user_query)
 
             # print("Query for web_search:", query)  # Debugging: print the query
 
@@ -51,35 +82,125 @@ class DATA_:
 
         except Exception as e:
             return f"Your query could not be processed: {e}"
-        
+
 class WebSurfer:
     def __init__(self,
-                 llm: Type[GroqLLM]) -> None:
-        self.llm = llm
-        self.data_agent = DATA_(llm=self.llm) # Initialize data agent
-        self.llm.__init__(system_prompt="""
-        You are a WebSurfer, an AI agent designed to interact with the web. 
-        Your work is to summarize the web results provided to you.
-        
-        ## Instructions:
-        - Identify and prioritize the most important information from the web results.
-        - Provide a concise summary, aiming for around 100 words or less. 
-        - Do not include any URLs or links in your response.
-        - Only provide information that is directly present in the web results.
-        
-        ## Example:
-        **Web Results:** (Some lengthy web search results)
-        **Summary:** [summarized information in crisp and short].
-        
-        ***Remember: Your responses should be in text form only and not JSON or any other format.***""")
+                 llm: Type[GroqLLM],
+                 pipelined: bool = False,
+                 top_n: int = 3,
+                 page_tokens: int = 1500,
+                 max_workers: int = 8,
+                 scraper: Optional[HTMLContentScraper] = None) -> None:
+        """
+        Initializes the WebSurfer.
+
+        Args:
+            llm: The LLM backend. Every stage runs on its own fork of it.
+            pipelined (bool, optional): Read the top search hits instead of only their snippets (see `run_pipelined`).
+            top_n (int, optional): Number of pages fetched and summarized per query in pipelined mode.
+            page_tokens (int, optional): Maximum tokens of one page sent to its summarizer.
+            max_workers (int, optional): Maximum concurrent page summaries.
+            scraper (HTMLContentScraper, optional): Scraper used to fetch the pages (e.g. one with an HTTPCache).
+        """
+        self.llm = fork_llm(llm, system_prompt=SUMMARY_PROMPT)
+        self.data_agent = DATA_(llm=llm) # Initialize data agent
+        self.pipelined = pipelined
+        self.top_n = top_n
+        self.page_tokens = page_tokens
+        self.max_workers = max_workers
+        self.scraper = scraper or HTMLContentScraper(max_workers=max(top_n, 1))
 
     def run(self, user_query: str) -> str:
+        if self.pipelined:
+            return self.run_pipelined(user_query)
+
         web_results = self.data_agent.run(user_query)
-        
+
         self.llm.add_message("user", web_results)
         sweb_results = self.llm.run(f"***Summarize the web results***\n{web_results}")
         return sweb_results
 
+    # Pipelined mode
+
+    def _search(self, user_query: str) -> dict:
+        """Stage 1: writes the search query (own LLM context) and runs the search."""
+        try:
+            query = self.data_agent.write_query(user_query)
+        except Exception as e:
+            print(f"Falling back to the user query, the search query could not be written: {e}")
+            query = user_query
+        return multi_search(query, num_results=self.top_n)
+
+    def _summarize_page(self, user_query: str, result: dict, page: Optional[dict]) -> str:
+        """Summarizes one page (or its search snippet if it could not be fetched) on a fresh LLM fork."""
+        if page and page["text"]:
+            content = page["text"]
+            if count_tokens(content) > self.page_tokens:
+                content = format_passages(select_passages(content, user_query, token_budget=self.page_tokens))
+        else:
+            content = result["description"]
+        try:
+            note = fork_llm(self.llm, system_prompt=PAGE_PROMPT).run(
+                f"[QUERY]\n{user_query}\n\n[PAGE: {result['title']}]\n{content}"
+            ).strip()
+        except Exception as e:
+            return f"{result['title']}: {result['description']} (page summary failed: {e})"
+        return "" if note.upper() == "NONE" else f"{result['title']}:\n{note}"
+
+    def _read_and_merge(self, user_query: str, search: dict) -> str:
+        """Stage 2: fetches the top hits concurrently, summarizes each page as it arrives, and merges."""
+        # scrape_many reports URLs without their fragment (e.g. "#:~:text=" highlights)
+        results = {}
+        for result in search["results"]:
+            results.setdefault(urldefrag(result["url"])[0], result)
+        if not results:
+            return f"Your query could not be processed: no web results for {search['query']}"
+
+        notes = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._summarize_page, user_query, results[url], page): url
+                for url, page in self.scraper.scrape_many(results)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                url = futures[future]
+                try:
+                    notes[url] = future.result()
+                except Exception as e:
+                    print(f"Error reading {url}: {e}")
+                    notes[url] = f"{results[url]['title']}: {results[url]['description']}"
+
+        page_notes = "\n\n".join(notes[url] for url in results if notes.get(url)) or search["text"]
+        merger = fork_llm(self.llm, system_prompt=SUMMARY_PROMPT)
+        return merger.run(f"***Summarize the web results to answer: {user_query}***\n{page_notes}")
+
+    def run_pipelined(self, user_query: str) -> str:
+        """
+        Searches, reads the top `top_n` pages concurrently, summarizes each page in parallel
+        and merges the page summaries into one answer. Every LLM call has its own context.
+        """
+        return self._read_and_merge(user_query, self._search(user_query))
+
+    def run_many(self, user_queries: Iterable[str]) -> List[str]:
+        """
+        Answers several queries in pipelined mode, overlapping the search stage of the next
+        query with the page reading and summarizing stage of the current one.
+        """
+        user_queries = list(user_queries)
+        answers = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as searcher:
+            pending = searcher.submit(self._search, user_queries[0]) if user_queries else None
+            for i, user_query in enumerate(user_queries):
+                try:
+                    search = pending.result()
+                except Exception as e:
+                    search = {"query": user_query, "queries": [], "results": [], "text": ""}
+                    print(f"Error searching for '{user_query}': {e}")
+                if i + 1 < len(user_queries):
+                    pending = searcher.submit(self._search, user_queries[i + 1])
+                answers.append(self._read_and_merge(user_query, search))
+        return answers
+
 
 if __name__ == "__main__":
     # Make sure the Gemini class is correctly instantiated and accessible
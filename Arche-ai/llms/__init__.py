@@ -1,4 +1,6 @@
 from llms.Cohere import Cohere
 from llms.Groq import GroqLLM
 from llms.Gpt4o import Gpt4o
-from llms.Gemini import Gemini
\ No newline at end of file
+from llms.Gemini import Gemini
+from llms.coalesce import coalesce_llm
+from llms.fork import fork_llm
\ No newline at end of file
@@ -0,0 +1,69 @@
+import copy
+import hashlib
+import json
+from typing import Optional
+
+from utils.singleflight import SingleFlight
+
+# Shared by every coalesced LLM, so identical requests from different instances coalesce.
+llm_flight = SingleFlight()
+
+
+def request_key(llm, prompt) -> str:
+    """
+    Builds a key identifying an LLM request: backend, sampling settings, history and prompt.
+    """
+    payload = {
+        "backend": type(llm).__name__,
+        "model": getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "system_prompt": getattr(llm, "system_prompt", None),
+        "messages": getattr(llm, "messages", None),
+        "prompt": prompt,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def coalesce_llm(llm, flight: Optional[SingleFlight] = None):
+    """
+    Makes identical concurrent `llm.run` calls share one upstream request.
+
+    The key covers the backend, model, sampling settings, message history and
+    prompt, so only truly identical requests are coalesced. The patch lives on
+    the instance and survives the `llm.__init__(system_prompt=...)` calls the
+    agents make.
+
+    Args:
+        llm: Any LLM backend from `llms` (GroqLLM, Gemini, Cohere, Gpt4o, ...).
+        flight (SingleFlight, optional): Coalescing group. Defaults to `llm_flight`.
+
+    Returns:
+        The same llm instance.
+
+    Example:
+        >>> llm = coalesce_llm(GroqLLM())
+        >>> agent = Agent(llm=llm, tools=tools)
+    """
+    flight = flight or llm_flight
+    run = type(llm).run.__get__(llm)
+
+    def leader_run(prompt, *args, **kwargs):
+        messages = getattr(llm, "messages", None)
+        before = len(messages) if isinstance(messages, list) else None
+        result = run(prompt, *args, **kwargs)
+        # Turns the backend appended to its history (e.g. the assistant reply), replayed on followers
+        added = messages[before:] if before is not None and getattr(llm, "messages", None) is messages else []
+        return result, messages, added
+
+    def coalesced_run(prompt=None, *args, **kwargs):
+        result, leader_messages, added = flight.do(request_key(llm, prompt), leader_run, prompt, *args, **kwargs)
+        messages = getattr(llm, "messages", None)
+        if added and isinstance(messages, list) and messages is not leader_messages:
+            messages.extend(copy.deepcopy(added))
+        return result
+
+    llm.run = coalesced_run
+    llm.coalesce_flight = flight
+    return llm
@@ -0,0 +1,28 @@
+def fork_llm(llm, system_prompt=None):
+    """
+    Creates an independent instance of the same LLM backend with its own message history.
+
+    The backends keep their history in `self.messages` (and default it to a shared list),
+    so concurrent calls or a second system prompt on one instance overwrite each other.
+    A fork copies the model, sampling settings and API key, starts from an empty history
+    and keeps request coalescing if the original had it (see `coalesce_llm`).
+
+    Args:
+        llm: Any LLM backend from `llms` (GroqLLM, Gemini, Cohere, Gpt4o, ...).
+        system_prompt (str, optional): System prompt of the new instance.
+
+    Returns:
+        A new instance of `type(llm)`.
+    """
+    forked = type(llm)(
+        messages=[],
+        model=llm.model,
+        temperature=llm.temperature,
+        system_prompt=system_prompt,
+        max_tokens=llm.max_tokens,
+        api_key=getattr(llm, "api_key", None),
+    )
+    if "run" in vars(llm):
+        from llms.coalesce import coalesce_llm
+        coalesce_llm(forked, getattr(llm, "coalesce_flight", None))
+    return forked
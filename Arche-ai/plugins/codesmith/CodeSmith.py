@@ -3,13 +3,19 @@ try:
 except ImportError:
     pass
 
+import os
 import subprocess
-import tempfile
 import sys
 import re
 import json
 from rich.syntax import Syntax
 from prompts.codesmith import codesmithPrompt
+from plugins.codesmith.executor import ScriptExecutor
+from plugins.codesmith.forkserver import WorkerPool, DEFAULT_WARM_IMPORTS
+from plugins.codesmith.kernel import PersistentKernel
+from plugins.codesmith.history import HistoryCompactor
+from plugins.codesmith.exec_cache import ExecutionCache, script_hash
+from plugins.codesmith.deps import DependencyProvisioner
 
 from colorama import Fore, Back, Style
 import colorama
@@ -29,6 +35,14 @@ def print_json(json_obj, indent=4):
             print(Fore.LIGHTGREEN_EX + f'{value},')
     print(Fore.LIGHTGREEN_EX + "}")
 
+STATEFUL_NOTE = """
+
+STATEFUL SESSION:
+Your scripts run one after another in the same Python session, like notebook cells.
+Variables, imports and loaded data from previous scripts are still defined, so reuse them instead of recomputing or reloading.
+If a script reports that the session was restarted, everything has to be loaded again.
+"""
+
 def transform_gemini_messages(messages: list[dict[str, str]]):
     return [{"role": msg["role"].replace('assistant','model'), "parts": [msg["content"]]} for msg in messages]
 
@@ -40,14 +54,64 @@ class CodeSmith:
             keepHistory: bool = True,
             printScript: bool = True,
             printconfig: bool = True,
+            timeout: float = 60,
+            memoryLimitMB: int = 1024,
+            outputLimit: int = 100_000,
+            warmPool: bool = False,
+            warmImports: tuple = DEFAULT_WARM_IMPORTS,
+            stateful: bool = False,
+            outputTokens: int = 800,
+            errorTokens: int = 600,
+            historyTokens: int = 6000,
+            hashRepeats: bool = True,
+            cacheResults: bool = True,
+            cacheDir: str = None,
+            autoInstall: bool = False,
+            wheelhouse: str = None,
+            indexUrl: str = None,
+            allowPackages: tuple = None,
             ) -> None:
         self.llm: Gemini = llm
         self.maxRetries = maxRetries
         self.keepHistory = keepHistory
         self.verbose = printScript
         self.config = printconfig
+        # Script outputs fed back to the model are truncated, de-duplicated and kept within a token budget
+        self.compactor = HistoryCompactor(
+            output_tokens=outputTokens,
+            error_tokens=errorTokens,
+            history_tokens=historyTokens,
+            hash_repeats=hashRepeats,
+        )
+        self.stateful = stateful and os.name == "posix"
+        limits = dict(
+            timeout=timeout,
+            max_memory=memoryLimitMB * 1024 * 1024 if memoryLimitMB else None,
+            max_output=outputLimit,
+            on_output=self._echo,
+        )
+        if self.stateful:
+            # Successive scripts share one long-lived interpreter namespace (POSIX only)
+            self.pool = None
+            self.executor = PersistentKernel(**limits)
+        else:
+            # Scripts are forked from pre-warmed interpreters instead of starting cold (POSIX only)
+            self.pool = WorkerPool(warm_imports=warmImports) if warmPool and os.name == "posix" else None
+            self.executor = ScriptExecutor(pool=self.pool, **limits)
+        # Deterministic scripts are served from a content-addressed cache (not in stateful mode,
+        # where the output also depends on the session's variables)
+        self.exec_cache = ExecutionCache(disk_dir=cacheDir) if cacheResults and not self.stateful else None
+        self.last_result = None
+        # Opt-in: missing third-party imports are installed in one pip call before a script runs,
+        # restricted to `allowPackages` (or the wheels in `wheelhouse`) when given
+        self.provisioner = DependencyProvisioner(
+            wheelhouse=wheelhouse, index_url=indexUrl, allowed=allowPackages
+        ) if autoInstall else None
         # print(self.llm)
-        self.llm.__init__(system_prompt=codesmithPrompt())
+        system_prompt = codesmithPrompt()
+        if self.stateful:
+            system_prompt += STATEFUL_NOTE
+        self.llm.__init__(system_prompt=system_prompt)
 
     def filterCode(self, txt):
         pattern = r"```python(.*?)```"
@@ -65,44 +129,43 @@ class CodeSmith:
             check=True,
         )
     
+    @staticmethod
+    def _echo(stream: str, text: str) -> None:
+        print(text, end="", file=sys.stderr if stream == "stderr" else sys.stdout, flush=True)
+
     def _execute_script_in_subprocess(self, script) -> tuple[str, str, int]:
         from rich import print
-        output, error, return_code = "", "", 0
-        try:
-            python_executable = sys.executable
-            with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tmp_script:
-                tmp_script_name = tmp_script.name
-                tmp_script.write(script)
-                tmp_script.flush()
+        if self.verbose:print(Syntax(script, "python", theme="monokai"))
+        result = self.executor.run(script)
+        self.last_result = result
+        if result.limit:
+            print(result.error.splitlines()[-1])
+        return result.as_tuple()
 
-                process = subprocess.Popen(
-                    [python_executable, tmp_script_name],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    stdin=subprocess.DEVNULL,  # Raises EOF error if subprocess asks for input
-                    text=True,
-                )
+    def execute_script(self, script: str) -> tuple[str, str, int]:
+        if self.provisioner is not None:
+            _, failed = self.provisioner.ensure(script)
+            if failed:
+                print(Fore.YELLOW + f"Could not install {', '.join(failed)}")
+        if self.exec_cache is not None:
+            cached = self.exec_cache.get(script)
+            if cached is not None:
                 if self.verbose:print(Syntax(script, "python", theme="monokai"))
-                while True:
-                    _stdout = process.stdout.readline()
-                    _stderr = process.stderr.readline()
-                    if _stdout:
-                        output += _stdout
-                        print(_stdout, end="")
-                    if _stderr:
-                        error += _stderr
-                        print(_stderr, end="", file=sys.stderr)
-                    if _stdout == "" and _stderr == "" and process.poll() is not None:
-                        break
-                return_code = process.returncode
-        except Exception as e:
-            error += str(e)
-            print(e)
-            return_code = 1
+                print(Fore.LIGHTBLACK_EX + "(identical deterministic script, cached result)")
+                self._echo("stdout", cached[0])
+                self._echo("stderr", cached[1])
+                return cached
+        output, error, return_code = self._execute_script_in_subprocess(script)
+        if self.exec_cache is not None:
+            self.exec_cache.set(script, self.last_result)
         return output, error, return_code
 
-    def execute_script(self, script: str) -> tuple[str, str, int]:
-        return self._execute_script_in_subprocess(script)
+    @staticmethod
+    def _retry_hint(attempt: int) -> str:
+        return (
+            f"This script is identical to the one of attempt {attempt}, which failed, so it was not run again. "
+            "Fix the cause of that error and send a changed script."
+        )
     
     def run(self, prompt: str) -> None:
         if self.config:
@@ -118,9 +181,13 @@ class CodeSmith:
             print_json(data)
         the_copy = self.llm.messages.copy()
         self.llm.add_message("user", prompt)
+        self.compactor.reset()
+        attempt = 0
+        failed_scripts = {}  # script hash -> attempt that failed with it
         _continue = True
         while _continue:
             _continue = False
+            attempt += 1
             error, script, output, return_code = "", "", "", 0
             try:
                 response = self.llm.run(prompt)
@@ -130,15 +197,23 @@ class CodeSmith:
                     self.llm.add_message("assistant", response)
                 script = self.filterCode(response)
                 if script:
-                    output, error, return_code = self.execute_script(script)
+                    digest = script_hash(script)
+                    if digest in failed_scripts:
+                        # An identical retry would fail the same way; tell the model instead
+                        output, error, return_code = "", self._retry_hint(failed_scripts[digest]), 1
+                    else:
+                        output, error, return_code = self.execute_script(script)
+                        if return_code != 0:
+                            failed_scripts[digest] = attempt
             except KeyboardInterrupt:
                 break
             if output:
-                self.llm.add_message("user", f"LAST SCRIPT OUTPUT:\n{output}")
+                self.llm.add_message("user", self.compactor.output_message(output, attempt))
                 if output.strip().endswith("CONTINUE"):
                     _continue = True
             if error:
-                self.llm.add_message("user", f"Error: {error}")
+                self.llm.add_message("user", self.compactor.error_message(error, attempt))
+            self.compactor.fit(self.llm.messages)
             if return_code != 0:
                 self.maxRetries -= 1
                 if self.maxRetries > 0:
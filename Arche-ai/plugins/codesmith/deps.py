@@ -0,0 +1,255 @@
+import ast
+import importlib
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from typing import Iterable, Optional
+
+from plugins.codesmith.exec_cache import installed_digest
+
+# Import names whose distribution on PyPI has a different name
+MODULE_TO_DISTRIBUTION = {
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "Crypto": "pycryptodome",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fitz": "PyMuPDF",
+    "gi": "PyGObject",
+    "googlesearch": "googlesearch-python",
+    "jose": "python-jose",
+    "jwt": "PyJWT",
+    "Levenshtein": "python-Levenshtein",
+    "magic": "python-magic",
+    "MySQLdb": "mysqlclient",
+    "OpenSSL": "pyOpenSSL",
+    "PIL": "Pillow",
+    "pptx": "python-pptx",
+    "psycopg2": "psycopg2-binary",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "telegram": "python-telegram-bot",
+    "usb": "pyusb",
+    "win32api": "pywin32",
+    "win32con": "pywin32",
+    "yaml": "PyYAML",
+    "zmq": "pyzmq",
+}
+
+# Namespace packages shared by many distributions: the distribution cannot be guessed
+AMBIGUOUS_MODULES = {"google", "azure", "backports", "jaraco", "zope"}
+
+# Runtime state lives in Arche-ai/data, whatever the working directory
+STATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "codesmith_deps.json"
+)
+
+
+def find_imports(script: str) -> set:
+    """
+    Returns the top-level modules a script imports, skipping relative imports and
+    imports guarded by `try: ... except ImportError` (those are optional).
+    """
+    try:
+        tree = ast.parse(script)
+    except (SyntaxError, ValueError):
+        return set()
+
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try):
+            catches = set()
+            for handler in node.handlers:
+                names = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+                catches.update(getattr(name, "id", None) for name in names)
+            if catches & {"ImportError", "ModuleNotFoundError", "Exception", "BaseException", None}:
+                for child in node.body:
+                    guarded.update(id(n) for n in ast.walk(child))
+
+    modules = set()
+    for node in ast.walk(tree):
+        if id(node) in guarded:
+            continue
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+            modules.add(node.module.split(".")[0])
+    return modules
+
+
+def canonical_name(distribution: str) -> str:
+    """Normalizes a distribution name the way pip compares them (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", distribution).lower()
+
+
+class DependencyProvisioner:
+    """
+    Installs the missing third-party imports of a script in one batch before it runs.
+
+    Imports are found statically, standard-library and local modules are ignored, and
+    the rest are mapped to distributions (`MODULE_TO_DISTRIBUTION`, else the module name)
+    and installed with a single pip call, optionally from a local wheelhouse or a custom
+    index. The scripts are model-written, so a name may be hallucinated or typosquatted:
+    pass `allowed` to install only vetted distributions, or a wheelhouse to install only
+    the wheels in it. Modules known to be present are remembered per environment (keyed by the
+    installed-distributions digest, on disk if `state_path` is set), so later checks
+    cost no import-system lookups, and distributions that failed to install are not retried.
+    """
+
+    def __init__(
+        self,
+        python: str = sys.executable,
+        wheelhouse: Optional[str] = None,
+        index_url: Optional[str] = None,
+        extra_index_url: Optional[str] = None,
+        mapping: Optional[dict] = None,
+        allowed: Optional[Iterable[str]] = None,
+        state_path: Optional[str] = STATE_PATH,
+        timeout: float = 600,
+    ):
+        """
+        Initializes the provisioner.
+
+        Args:
+            python (str, optional): Interpreter the scripts run with; packages are installed into it.
+            wheelhouse (str, optional): Directory of wheels. When set, pip installs from it only (--no-index).
+            index_url (str, optional): Package index used instead of PyPI.
+            extra_index_url (str, optional): Additional package index.
+            mapping (dict, optional): Extra import name -> distribution entries.
+            allowed (Iterable[str], optional): Distributions that may be installed. Others are reported
+                                               as failed without calling pip. None allows any.
+            state_path (str, optional): JSON file caching the resolved environment. None keeps it in memory.
+            timeout (float, optional): Seconds allowed for one pip call.
+        """
+        self.python = python
+        self.wheelhouse = wheelhouse
+        self.index_url = index_url
+        self.extra_index_url = extra_index_url
+        self.mapping = {**MODULE_TO_DISTRIBUTION, **(mapping or {})}
+        self.allowed = None if allowed is None else {canonical_name(d) for d in allowed}
+        self.state_path = state_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+
+    def _load_state(self) -> dict:
+        if self.state_path:
+            try:
+                with open(self.state_path, "r") as f:
+                    state = json.load(f)
+                return {"digest": state["digest"], "present": set(state["present"]), "failed": set(state["failed"])}
+            except (OSError, ValueError, KeyError):
+                pass
+        return {"digest": None, "present": set(), "failed": set()}
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        state = {key: sorted(value) if isinstance(value, set) else value for key, value in self._state.items()}
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(f"{self.state_path}.tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+
+    def _is_available(self, modules: list, cwd: str) -> dict:
+        """Checks which modules the target interpreter can import (without importing them)."""
+        local = {m for m in modules if os.path.exists(os.path.join(cwd, f"{m}.py")) or os.path.isdir(os.path.join(cwd, m))}
+        if self.python == sys.executable:
+            importlib.invalidate_caches()
+            return {m: m in local or importlib.util.find_spec(m) is not None for m in modules}
+        code = (
+            "import importlib.util, json, sys\n"
+            "print(json.dumps({m: importlib.util.find_spec(m) is not None for m in sys.argv[1:]}))"
+        )
+        try:
+            out = subprocess.run([self.python, "-c", code, *modules], capture_output=True, text=True, timeout=60, cwd=cwd)
+            found = json.loads(out.stdout)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            found = {m: True for m in modules}  # cannot tell; let the script report it
+        return {m: found.get(m, True) or m in local for m in modules}
+
+    def missing(self, script: str, cwd: Optional[str] = None) -> list:
+        """
+        Returns the distributions that have to be installed for a script to import.
+        """
+        cwd = cwd or os.getcwd()
+        stdlib = getattr(sys, "stdlib_module_names", set()) | set(sys.builtin_module_names)
+        modules = sorted(m for m in find_imports(script) if m not in stdlib and m not in AMBIGUOUS_MODULES)
+        with self._lock:
+            digest = installed_digest()
+            if self._state["digest"] != digest:
+                self._state = {"digest": digest, "present": set(), "failed": self._state["failed"]}
+            unknown = [m for m in modules if m not in self._state["present"]]
+            if not unknown:
+                return []
+            found = self._is_available(unknown, cwd)
+            self._state["present"].update(m for m, ok in found.items() if ok)
+            self._save_state()
+            distributions = [self.mapping.get(m, m) for m, ok in found.items() if not ok]
+            return [d for d in dict.fromkeys(distributions) if canonical_name(d) not in self._state["failed"]]
+
+    def _pip(self, distributions: Iterable[str]) -> subprocess.CompletedProcess:
+        command = [self.python, "-m", "pip", "install", "--no-input", "--disable-pip-version-check"]
+        if self.wheelhouse:
+            command += ["--no-index", "--find-links", self.wheelhouse]
+        if self.index_url:
+            command += ["--index-url", self.index_url]
+        if self.extra_index_url:
+            command += ["--extra-index-url", self.extra_index_url]
+        return subprocess.run(command + list(distributions), capture_output=True, text=True, timeout=self.timeout)
+
+    def install(self, distributions: list) -> tuple[list, list]:
+        """
+        Installs distributions with one pip call; if that fails, installs them one by one
+        to find the ones that cannot be installed.
+
+        Returns:
+            tuple: (installed, failed) lists of distribution names.
+        """
+        if not distributions:
+            return [], []
+        try:
+            if self._pip(distributions).returncode == 0:
+                return list(distributions), []
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error installing {', '.join(distributions)}: {e}")
+            return [], list(distributions)
+
+        installed, failed = [], []
+        for distribution in distributions:
+            try:
+                ok = self._pip([distribution]).returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                ok = False
+            (installed if ok else failed).append(distribution)
+        with self._lock:
+            self._state["failed"].update(canonical_name(d) for d in failed)
+            self._save_state()
+        return installed, failed
+
+    def ensure(self, script: str, cwd: Optional[str] = None) -> tuple[list, list]:
+        """
+        Installs every missing dependency of a script in one step.
+
+        Returns:
+            tuple: (installed, failed) lists of distribution names; both empty if nothing was missing.
+        """
+        distributions = self.missing(script, cwd)
+        refused = []
+        if self.allowed is not None:
+            refused = [d for d in distributions if canonical_name(d) not in self.allowed]
+            distributions = [d for d in distributions if canonical_name(d) in self.allowed]
+            if refused:
+                print(f"Not installing {', '.join(refused)}: not in the allowed packages.")
+        if not distributions:
+            return [], refused
+        print(f"Installing {', '.join(distributions)} with pip...")
+        installed, failed = self.install(distributions)
+        return installed, failed + refused
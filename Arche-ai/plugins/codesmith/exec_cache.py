@@ -0,0 +1,188 @@
+import ast
+import hashlib
+import os
+import platform
+import sys
+import threading
+from importlib import metadata
+from typing import Optional
+
+from tools.cache import MISSING, CachePolicy
+
+# Importing any of these makes a script's output depend on the outside world (clock,
+# randomness, network, processes, files) or gives it side effects a cached result would skip.
+NONDETERMINISTIC_MODULES = {
+    "random", "secrets", "uuid", "time", "datetime", "calendar", "zoneinfo",
+    "socket", "ssl", "select", "selectors", "http", "urllib", "urllib3", "requests", "httpx", "aiohttp",
+    "ftplib", "smtplib", "imaplib", "poplib", "webbrowser",
+    "os", "shutil", "pathlib", "glob", "tempfile", "fileinput", "sqlite3", "dbm", "shelve",
+    "subprocess", "multiprocessing", "threading", "concurrent", "asyncio", "signal", "psutil", "platform",
+    "getpass", "sched", "faker", "yfinance", "googlesearch", "matplotlib", "PIL", "cv2", "tkinter", "pyautogui",
+    "importlib",
+}
+
+# Calls and attributes with the same effect, e.g. `open(...)`, `np.random.rand()`, `df.to_csv()`
+NONDETERMINISTIC_NAMES = {
+    "open", "input", "exec", "eval", "compile", "__import__", "breakpoint", "id", "hash", "globals", "vars",
+    "random", "rand", "randn", "randint", "default_rng", "choice", "shuffle", "permutation", "sample", "seed",
+    "now", "today", "utcnow", "time", "time_ns", "perf_counter", "monotonic", "environ", "getenv", "urandom",
+    "system", "popen", "listdir", "scandir", "walk", "remove", "unlink", "rename", "mkdir", "makedirs",
+    "read_csv", "read_excel", "read_json", "read_parquet", "read_table", "read_sql", "read_html", "read_pickle",
+    "load", "loadtxt", "genfromtxt", "fromfile", "save", "savez", "savetxt", "tofile", "savefig", "show",
+    "to_csv", "to_excel", "to_json", "to_parquet", "to_pickle", "to_sql", "write", "download",
+    "import_module", "set", "frozenset",
+}
+
+
+def normalize_script(script: str) -> str:
+    """
+    Returns a canonical form of a script: its AST without positions, so comments,
+    blank lines and formatting do not change it. Falls back to the stripped source
+    if the script does not parse.
+    """
+    try:
+        return ast.dump(ast.parse(script), annotate_fields=False, include_attributes=False)
+    except (SyntaxError, ValueError):
+        return script.strip()
+
+
+def script_hash(script: str) -> str:
+    """SHA-256 of the normalized script."""
+    return hashlib.sha256(normalize_script(script).encode("utf-8")).hexdigest()
+
+
+def is_deterministic(script: str) -> bool:
+    """
+    Statically decides whether a script's output depends only on its code and the
+    environment: no clock, randomness, network, process or file access (see
+    `NONDETERMINISTIC_MODULES` and `NONDETERMINISTIC_NAMES`), no dynamic imports and
+    no sets, whose iteration order changes between runs with hash randomization.
+    Errs on the side of False.
+    """
+    try:
+        tree = ast.parse(script)
+    except (SyntaxError, ValueError):
+        return False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            if any(alias.name.split(".")[0] in NONDETERMINISTIC_MODULES for alias in node.names):
+                return False
+        elif isinstance(node, ast.ImportFrom):
+            if node.level or (node.module or "").split(".")[0] in NONDETERMINISTIC_MODULES:
+                return False
+            if any(alias.name in NONDETERMINISTIC_NAMES for alias in node.names):
+                return False
+        elif isinstance(node, ast.Name) and node.id in NONDETERMINISTIC_NAMES:
+            return False
+        elif isinstance(node, ast.Attribute) and node.attr in NONDETERMINISTIC_NAMES:
+            return False
+        elif isinstance(node, (ast.Set, ast.SetComp)):
+            return False
+    return True
+
+
+_installed = {"mtimes": None, "digest": ""}
+_installed_lock = threading.Lock()
+
+
+def installed_digest() -> str:
+    """
+    Hash of the installed distributions. It is recomputed only when a directory on
+    sys.path changes (installing a package touches its site-packages directory).
+    """
+    mtimes = []
+    for path in sys.path:
+        try:
+            mtimes.append(os.stat(path or ".").st_mtime)
+        except OSError:
+            mtimes.append(None)
+    with _installed_lock:
+        if _installed["mtimes"] != mtimes:
+            names = sorted(f"{dist.metadata['Name']}=={dist.version}" for dist in metadata.distributions())
+            _installed["digest"] = hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()
+            _installed["mtimes"] = mtimes
+        return _installed["digest"]
+
+
+def environment_fingerprint(python: str = sys.executable, cwd: Optional[str] = None) -> str:
+    """
+    Fingerprint of everything a deterministic script can still see: the interpreter,
+    the installed distributions and the files in its working directory (names, sizes
+    and modification times, top level only).
+    """
+    cwd = cwd or os.getcwd()
+    parts = [python, platform.python_version(), installed_digest(), os.path.abspath(cwd)]
+    try:
+        with os.scandir(cwd) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                parts.append(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    except OSError:
+        pass
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def _shared_policy(ttl: float, max_entries: int, disk_dir: Optional[str]) -> CachePolicy:
+    """
+    Returns the process-wide policy of a cache configuration, created on first use, so
+    CodeSmith instances share their results and metrics instead of registering a
+    policy each.
+    """
+    config = (ttl, max_entries, disk_dir and os.path.abspath(disk_dir))
+    with _policies_lock:
+        if config not in _policies:
+            name = "codesmith.execute" if not _policies else f"codesmith.execute.{len(_policies)}"
+            _policies[config] = CachePolicy(ttl=ttl, max_entries=max_entries, disk_dir=disk_dir, name=name)
+        return _policies[config]
+
+
+class ExecutionCache:
+    """
+    Content-addressed cache of script results.
+
+    The key is the normalized AST hash of the script plus the environment fingerprint,
+    so a reformatted copy of a script hits the same entry, and installing a package or
+    changing a file in the working directory misses. Only deterministic scripts (see
+    `is_deterministic`) that finished without hitting a limit are cached.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 256, disk_dir: Optional[str] = None, python: str = sys.executable):
+        """
+        Initializes the cache.
+
+        Args:
+            ttl (float, optional): Seconds a result stays valid.
+            max_entries (int, optional): Maximum number of results kept in memory.
+            disk_dir (str, optional): Directory of an on-disk tier, shared across runs. Disabled when None.
+            python (str, optional): Interpreter the scripts run with (part of the fingerprint).
+        """
+        self.python = python
+        self.policy = _shared_policy(ttl, max_entries, disk_dir)
+
+    def key(self, script: str, cwd: Optional[str] = None) -> str:
+        return f"{script_hash(script)}:{environment_fingerprint(self.python, cwd)}"
+
+    def get(self, script: str, cwd: Optional[str] = None) -> Optional[tuple[str, str, int]]:
+        """
+        Returns the cached (output, error, return_code) of a script, or None on a miss
+        or if the script is not deterministic.
+        """
+        if not is_deterministic(script):
+            return None
+        value = self.policy.get(self.key(script, cwd))
+        return None if value is MISSING else value
+
+    def set(self, script: str, result, cwd: Optional[str] = None) -> None:
+        """Caches an `ExecutionResult` if the script is deterministic and no limit stopped it."""
+        if result.limit is None and is_deterministic(script):
+            self.policy.set(self.key(script, cwd), result.as_tuple())
+
+    def metrics(self) -> dict:
+        return self.policy.metrics()
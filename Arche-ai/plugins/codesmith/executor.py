@@ -0,0 +1,293 @@
+import codecs
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from plugins.codesmith.forkserver import WorkerPool, apply_limits
+
+try:
+    import resource
+    import selectors
+except ImportError:  # Windows: no rlimits, and pipes cannot be selected
+    resource = None
+
+POSIX = os.name == "posix" and resource is not None
+
+# Last line of a traceback raised by a failed allocation, e.g. numpy's `_ArrayMemoryError`
+_MEMORY_ERROR = re.compile(r"^(?:[\w.]+\.)?_?\w*MemoryError\b")
+
+
+class ExecutionResult:
+    """
+    Outcome of one script run.
+
+    Attributes:
+        output (str): Captured stdout (at most `max_output` characters).
+        error (str): Captured stderr, followed by a note if a limit stopped the script.
+        return_code (int): Exit code; negative for a signal, 1 if the script could not be started.
+        limit (str): "timeout", "cpu", "memory" or "output" if a limit stopped the script, else None.
+        truncated (bool): True if output was dropped because of the output cap.
+        duration (float): Wall-clock seconds.
+        max_rss (int): Peak resident memory seen while polling, in bytes (0 if unknown).
+    """
+
+    def __init__(self):
+        self.output = ""
+        self.error = ""
+        self.return_code = 0
+        self.limit = None
+        self.truncated = False
+        self.duration = 0.0
+        self.max_rss = 0
+
+    def as_tuple(self) -> tuple[str, str, int]:
+        return self.output, self.error, self.return_code
+
+
+def _memory_error(stderr: str) -> bool:
+    """True if a script died of a MemoryError, e.g. an allocation refused by RLIMIT_AS."""
+    lines = [line for line in stderr.splitlines() if line.strip()]
+    return bool(lines) and bool(_MEMORY_ERROR.match(lines[-1].strip()))
+
+
+def _rss(pid: int) -> int:
+    """Resident memory of a process in bytes, read from /proc (0 where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+class ScriptExecutor:
+    """
+    Runs Python scripts in a subprocess without blocking on its pipes.
+
+    stdout and stderr are multiplexed with `selectors` (reader threads on Windows), so a
+    script flooding one stream while the other is idle cannot deadlock. The run is stopped
+    when it exceeds its wall-clock time, CPU time (RLIMIT_CPU), resident memory (RLIMIT_AS
+    plus RSS polling) or output size, and the script file is always removed afterwards.
+    With a `WorkerPool`, scripts are forked from a pre-warmed interpreter instead of
+    starting a new one.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        cpu_time: Optional[float] = None,
+        max_memory: Optional[int] = 1024 * 1024 * 1024,
+        max_output: int = 1_000_000,
+        poll_interval: float = 0.1,
+        python: str = sys.executable,
+        on_output: Optional[Callable[[str, str], None]] = None,
+        pool: Optional[WorkerPool] = None,
+    ):
+        """
+        Initializes the executor.
+
+        Args:
+            timeout (float, optional): Wall-clock limit in seconds. None disables it.
+            cpu_time (float, optional): CPU-time limit in seconds. Defaults to `timeout`.
+            max_memory (int, optional): Memory limit in bytes. None disables it.
+            max_output (int, optional): Maximum characters kept per stream; the script is stopped past it.
+            poll_interval (float, optional): Seconds between limit checks.
+            python (str, optional): Interpreter used to run the scripts.
+            on_output (Callable, optional): Called as `on_output(stream, text)` ("stdout"/"stderr")
+                                            for every chunk of output, e.g. to echo it live.
+            pool (WorkerPool, optional): Pre-warmed fork servers to run the scripts in (POSIX only).
+        """
+        self.timeout = timeout
+        self.cpu_time = cpu_time if cpu_time is not None else timeout
+        self.max_memory = max_memory
+        self.max_output = max_output
+        self.poll_interval = poll_interval
+        self.python = python
+        self.on_output = on_output
+        self.pool = pool
+
+    def _set_limits(self):
+        """Runs in the child before exec: applies rlimits."""
+        apply_limits(self.cpu_time, self.max_memory)
+
+    def _spawn(self, path: str, cwd: Optional[str]):
+        if self.pool is not None and POSIX:
+            try:
+                return self.pool.spawn(path, cwd=cwd, cpu_time=self.cpu_time, max_memory=self.max_memory)
+            except OSError as e:
+                print(f"Worker pool unavailable, starting a new interpreter: {e}")
+        options = {"start_new_session": True, "preexec_fn": self._set_limits} if POSIX else {}
+        return subprocess.Popen(
+            [self.python, path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,  # Raises EOF error if the script asks for input
+            cwd=cwd,
+            **options,
+        )
+
+    @staticmethod
+    def _kill(process: subprocess.Popen):
+        """Kills the script and any children it started."""
+        try:
+            if POSIX:
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+
+    def _chunks(self, process: subprocess.Popen):
+        """
+        Yields (stream, bytes) as output arrives, or (None, None) every `poll_interval`
+        so limits can be checked. Ends when both pipes are closed.
+        """
+        if POSIX:
+            selector = selectors.DefaultSelector()
+            selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+            selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+            try:
+                while selector.get_map():
+                    events = selector.select(timeout=self.poll_interval)
+                    if not events:
+                        yield None, None
+                    for key, _ in events:
+                        data = os.read(key.fd, 65536)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                            continue
+                        yield key.data, data
+            finally:
+                selector.close()
+            return
+
+        chunks = queue.Queue()
+
+        def pump(pipe, stream):
+            for data in iter(lambda: pipe.read1(65536), b""):
+                chunks.put((stream, data))
+            chunks.put((stream, None))
+
+        for pipe, stream in ((process.stdout, "stdout"), (process.stderr, "stderr")):
+            threading.Thread(target=pump, args=(pipe, stream), daemon=True).start()
+        open_streams = 2
+        while open_streams:
+            try:
+                stream, data = chunks.get(timeout=self.poll_interval)
+            except queue.Empty:
+                yield None, None
+                continue
+            if data is None:
+                open_streams -= 1
+            else:
+                yield stream, data
+
+    def _check_limits(self, process, result: ExecutionResult, start: float, now: float) -> None:
+        """Kills the script if it exceeded its wall-clock time or memory, recording the limit hit."""
+        if self.timeout and now - start > self.timeout:
+            result.limit = "timeout"
+            self._kill(process)
+        elif self.max_memory:
+            rss = _rss(process.pid)
+            result.max_rss = max(result.max_rss, rss)
+            if rss > self.max_memory:
+                result.limit = "memory"
+                self._kill(process)
+
+    def run(self, script: str, cwd: Optional[str] = None) -> ExecutionResult:
+        """
+        Runs a script and returns its captured output and how it ended.
+
+        Args:
+            script (str): Python source code.
+            cwd (str, optional): Working directory of the script.
+
+        Returns:
+            ExecutionResult: The captured output, return code and the limit hit, if any.
+        """
+        result = ExecutionResult()
+        fd, path = tempfile.mkstemp(suffix=".py", prefix="codesmith_")
+        start = time.monotonic()
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(script)
+            process = self._spawn(path, cwd)
+        except Exception as e:
+            os.remove(path)
+            result.error, result.return_code = str(e), 1
+            return result
+
+        decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")}
+        captured = {"stdout": [], "stderr": []}
+        sizes = {"stdout": 0, "stderr": 0}
+        next_check = start
+        try:
+            for stream, data in self._chunks(process):
+                if data:
+                    text = decoders[stream].decode(data)
+                    if self.on_output is not None and text:
+                        self.on_output(stream, text)
+                    room = self.max_output - sizes[stream]
+                    if len(text) > room:
+                        text = text[:max(room, 0)]
+                        result.truncated = True
+                    captured[stream].append(text)
+                    sizes[stream] += len(text)
+                    if result.truncated and result.limit is None:
+                        result.limit = "output"
+                        self._kill(process)
+
+                now = time.monotonic()
+                if now < next_check or result.limit is not None:
+                    continue
+                next_check = now + self.poll_interval
+                self._check_limits(process, result, start, now)
+            # The script may close its pipes and keep running: the limits still apply
+            while result.limit is None:
+                try:
+                    process.wait(timeout=self.poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    self._check_limits(process, result, start, time.monotonic())
+            process.wait()
+        except BaseException:
+            self._kill(process)
+            process.wait()
+            raise
+        finally:
+            for pipe in (process.stdout, process.stderr):
+                pipe.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        result.duration = time.monotonic() - start
+        result.return_code = process.returncode
+        if POSIX and result.limit is None and process.returncode == -signal.SIGXCPU:
+            result.limit = "cpu"
+        result.output = "".join(captured["stdout"])
+        result.error = "".join(captured["stderr"])
+        if self.max_memory and result.limit is None and result.return_code != 0 and _memory_error(result.error):
+            result.limit = "memory"
+
+        notes = {
+            "timeout": f"Execution stopped: exceeded the wall-clock limit of {self.timeout}s.",
+            "cpu": f"Execution stopped: exceeded the CPU-time limit of {self.cpu_time}s.",
+            "memory": f"Execution stopped: exceeded the memory limit of {(self.max_memory or 0) // (1024 * 1024)} MB.",
+            "output": f"Execution stopped: output exceeded {self.max_output} characters.",
+        }
+        if result.limit is not None:
+            result.error += ("\n" if result.error else "") + notes[result.limit]
+            if result.return_code == 0:
+                result.return_code = 1
+        return result
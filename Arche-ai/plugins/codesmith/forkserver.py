@@ -0,0 +1,291 @@
+"""
+Pre-warmed fork server for CodeSmith scripts.
+
+A server is a long-lived interpreter that imports the heavy libraries once and then
+forks a fresh child for every script: the child gets the script's stdout/stderr pipes
+over a UNIX socket (`socket.send_fds`), runs the script as `__main__` and exits, so each
+script starts with the warm imports but shares no state with the previous ones.
+
+This file is also the server's entry point and only imports the standard library.
+"""
+
+import importlib
+import json
+import os
+import queue
+import runpy
+import select
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Iterable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_WARM_IMPORTS = ("numpy", "pandas")
+
+
+def apply_limits(cpu_time: Optional[float] = None, max_memory: Optional[int] = None) -> None:
+    """Applies CPU-time and memory rlimits to the current process (no-op without `resource`)."""
+    if resource is None:
+        return
+    if cpu_time:
+        seconds = int(cpu_time + 0.999)
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+    if max_memory:
+        # Address space is larger than RSS, so leave headroom; RSS itself is polled by the executor
+        limit = int(max_memory * 2)
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+
+# Server side
+
+def _run_child(request: dict, stdout_fd: int, stderr_fd: int) -> None:
+    """Runs in the forked child: wires up stdio, applies limits and runs the script. Never returns."""
+    code = 0
+    try:
+        os.setsid()
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)  # Raises EOF error if the script asks for input
+        os.close(devnull)
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        apply_limits(request.get("cpu_time"), request.get("max_memory"))
+
+        path = request["path"]
+        sys.argv = [path]
+        sys.path[0] = os.path.dirname(os.path.abspath(path))
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if e.code is not None and not isinstance(e.code, int):
+            print(e.code, file=sys.stderr)
+    except BaseException as e:
+        # Hide the server and runpy frames, so the traceback reads like `python script.py`
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != request.get("path"):
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os._exit(code)
+
+
+def serve(fd: int, warm_imports: Iterable[str]) -> None:
+    """Server loop: imports the warm modules, then runs one forked child per request."""
+    for name in warm_imports:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+    sock = socket.socket(fileno=fd)
+    while True:
+        try:
+            data, fds, _, _ = socket.recv_fds(sock, 65536, 2)
+        except OSError:
+            return
+        if not data:
+            return
+        request = json.loads(data)
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            _run_child(request, *fds)
+        for received in fds:
+            os.close(received)
+        sock.sendall(f"{pid}\n".encode())
+        _, status = os.waitpid(pid, 0)
+        sock.sendall(f"{os.waitstatus_to_exitcode(status)}\n".encode())
+
+
+# Client side
+
+class ForkedProcess:
+    """
+    Handle of a script running in a fork server, with the parts of the `subprocess.Popen`
+    interface the executor uses (`pid`, `stdout`, `stderr`, `wait`, `returncode`).
+    """
+
+    def __init__(self, server: "ForkServer", pid: int, stdout, stderr):
+        self.server = server
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Waits for the script to end; raises subprocess.TimeoutExpired after `timeout` seconds."""
+        if self.returncode is None:
+            line = self.server.readline(timeout)
+            if line is None:
+                raise subprocess.TimeoutExpired(f"forked script {self.pid}", timeout)
+            self.returncode = int(line) if line.strip() else -9
+            self.server.release(alive=bool(line))
+        return self.returncode
+
+
+class ForkServer:
+    """One warm server process and its control socket."""
+
+    def __init__(self, pool: "WorkerPool", python: str, warm_imports: Iterable[str]):
+        self.pool = pool
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.process = subprocess.Popen(
+            [python, os.path.abspath(__file__), str(child.fileno()), *warm_imports],
+            pass_fds=(child.fileno(),),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        child.close()
+        self.sock = parent
+        self._buffer = b""
+
+    def readline(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Reads one reply line from the server: b"" if it is gone, None if nothing arrived within `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([self.sock], [], [], remaining)[0]:
+                    return None
+            try:
+                data = self.sock.recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                line, self._buffer = self._buffer, b""
+                return line
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line + b"\n"
+
+    def spawn(self, request: dict) -> ForkedProcess:
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        try:
+            socket.send_fds(self.sock, [json.dumps(request).encode()], [stdout_w, stderr_w])
+            line = self.readline()
+        except OSError:
+            line = b""
+        finally:
+            os.close(stdout_w)
+            os.close(stderr_w)
+        if not line.strip():
+            os.close(stdout_r)
+            os.close(stderr_r)
+            raise OSError("The fork server is not running.")
+        return ForkedProcess(self, int(line), os.fdopen(stdout_r, "rb", buffering=0), os.fdopen(stderr_r, "rb", buffering=0))
+
+    def release(self, alive: bool = True) -> None:
+        self.pool._release(self, alive)
+
+    def close(self) -> None:
+        self.sock.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class WorkerPool:
+    """
+    Pool of pre-warmed fork servers (POSIX only).
+
+    Each server imports `warm_imports` once at startup, in the background; every script
+    then runs in a clean child forked from a warm server, skipping interpreter startup and
+    those imports. `size` servers allow that many scripts to run at the same time.
+    """
+
+    def __init__(self, size: int = 1, warm_imports: Iterable[str] = DEFAULT_WARM_IMPORTS, python: str = sys.executable):
+        """
+        Initializes the pool and starts its servers.
+
+        Args:
+            size (int, optional): Number of warm servers, i.e. of concurrent scripts.
+            warm_imports (Iterable[str], optional): Modules imported by every server before forking.
+            python (str, optional): Interpreter running the servers.
+        """
+        if os.name != "posix" or not hasattr(socket, "send_fds"):
+            raise OSError("WorkerPool needs fork and socket.send_fds (POSIX, Python 3.9+).")
+        self.python = python
+        self.warm_imports = tuple(warm_imports)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._servers = []
+        for _ in range(size):
+            self._idle.put(self._start())
+
+    def _start(self) -> ForkServer:
+        server = ForkServer(self, self.python, self.warm_imports)
+        with self._lock:
+            self._servers.append(server)
+        return server
+
+    def _release(self, server: ForkServer, alive: bool) -> None:
+        if not alive:
+            with self._lock:
+                self._servers.remove(server)
+            server.close()
+            server = self._start()
+        self._idle.put(server)
+
+    def spawn(self, path: str, cwd: Optional[str] = None, cpu_time: Optional[float] = None, max_memory: Optional[int] = None) -> ForkedProcess:
+        """
+        Runs a script file in a child forked from an idle warm server, waiting for one if all are busy.
+
+        Returns:
+            ForkedProcess: The running script; `wait()` returns its exit code and frees the server.
+        """
+        request = {"path": path, "cwd": cwd or os.getcwd(), "cpu_time": cpu_time, "max_memory": max_memory}
+        server = self._idle.get()
+        try:
+            return server.spawn(request)
+        except OSError:
+            # The server died (e.g. killed by a limit); replace it and try once more
+            with self._lock:
+                self._servers.remove(server)
+            server.close()
+            server = self._start()
+            try:
+                return server.spawn(request)
+            except OSError:
+                self._idle.put(server)
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            servers, self._servers = self._servers, []
+        for server in servers:
+            server.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]), sys.argv[2:])
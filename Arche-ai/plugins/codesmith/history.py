@@ -0,0 +1,159 @@
+import hashlib
+import re
+from typing import Optional
+
+from utils.tokens import count_tokens, elide
+
+OUTPUT_PREFIX = "LAST SCRIPT OUTPUT:\n"
+ERROR_PREFIX = "Error: "
+
+_FRAME = re.compile(r'^\s*File "([^"]*)", line (\d+)', re.MULTILINE)
+_REFERENCE = re.compile(r"\[Same (?:output|error) as attempt (\d+)")
+
+
+def _content(message: dict) -> str:
+    """Text of a message in either format used by the backends ('content' or Gemini-style 'parts')."""
+    if "parts" in message:
+        return "".join(str(part) for part in message["parts"])
+    return str(message.get("content", ""))
+
+
+def _set_content(message: dict, text: str) -> None:
+    if "parts" in message:
+        message["parts"] = [text]
+    else:
+        message["content"] = text
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()[:10]
+
+
+class HistoryCompactor:
+    """
+    Keeps the script outputs and errors that CodeSmith feeds back to the model small.
+
+    Each output or error is cut to a token budget by keeping its head and tail, long
+    tracebacks keep only their outer and innermost frames, an error already reported
+    earlier in the task is replaced by a one-line reference, and (optionally) an output
+    identical to an earlier one is replaced by a reference to it. `fit` then shrinks the
+    oldest script results until the whole conversation fits `history_tokens`.
+    """
+
+    def __init__(
+        self,
+        output_tokens: int = 800,
+        error_tokens: int = 600,
+        history_tokens: int = 6000,
+        head_ratio: float = 0.4,
+        hash_repeats: bool = True,
+        keep_recent: int = 2,
+    ):
+        """
+        Initializes the compactor.
+
+        Args:
+            output_tokens (int, optional): Token budget of one script output.
+            error_tokens (int, optional): Token budget of one error.
+            history_tokens (int, optional): Token budget of the whole conversation. None disables `fit`.
+            head_ratio (float, optional): Share of a budget kept from the head of a text (the rest is its tail).
+            hash_repeats (bool, optional): Replace outputs identical to an earlier one with a reference to it.
+            keep_recent (int, optional): Number of latest script results `fit` never shrinks.
+        """
+        self.output_tokens = output_tokens
+        self.error_tokens = error_tokens
+        self.history_tokens = history_tokens
+        self.head_ratio = head_ratio
+        self.hash_repeats = hash_repeats
+        self.keep_recent = keep_recent
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets the outputs and errors seen, e.g. at the start of a new task."""
+        self._outputs = {}
+        self._errors = {}
+        self._rendered = {}  # attempt -> messages that later ones may refer to
+
+    def output_message(self, output: str, attempt: int) -> str:
+        """Returns the compacted 'LAST SCRIPT OUTPUT' message of an attempt."""
+        digest = _digest(output)
+        if self.hash_repeats and digest in self._outputs:
+            return f"{OUTPUT_PREFIX}[Same output as attempt {self._outputs[digest]} (sha1 {digest})]"
+        self._outputs.setdefault(digest, attempt)
+        message = OUTPUT_PREFIX + elide(output, self.output_tokens, self.head_ratio)
+        self._rendered.setdefault(attempt, []).append(message)
+        return message
+
+    def error_message(self, error: str, attempt: int) -> str:
+        """Returns the compacted 'Error' message of an attempt."""
+        lines = [line for line in error.strip().splitlines() if line.strip()]
+        last_line = lines[-1] if lines else error.strip()
+        # Tracebacks differ between attempts only by the temporary script name
+        signature = _digest(re.sub(r'File "(?:[^"]*codesmith_\w+\.py|<cell-\d+>)"', 'File "<script>"', error.strip()))
+        if signature in self._errors:
+            return f"{ERROR_PREFIX}[Same error as attempt {self._errors[signature]}] {last_line}"
+        self._errors[signature] = attempt
+        message = ERROR_PREFIX + elide(self._compact_traceback(error), self.error_tokens, self.head_ratio)
+        self._rendered.setdefault(attempt, []).append(message)
+        return message
+
+    @staticmethod
+    def _compact_traceback(error: str, outer: int = 1, inner: int = 3) -> str:
+        """Keeps the first `outer` and last `inner` frames of each traceback in a text."""
+        frames = list(_FRAME.finditer(error))
+        if len(frames) <= outer + inner:
+            return error
+        cut_start = frames[outer].start()
+        cut_end = frames[-inner].start()
+        omitted = len(frames) - outer - inner
+        return f"{error[:cut_start]}  ... [{omitted} frames omitted] ...\n{error[cut_end:]}"
+
+    def fit(self, messages: list, budget: Optional[int] = None) -> int:
+        """
+        Shrinks older script outputs and errors until the messages fit the budget: first
+        to a short head/tail excerpt, then to a one-line placeholder. A result that a
+        later "Same ... as attempt N" message refers to is never reduced to a placeholder.
+        Shrunk messages are replaced by copies in `messages`, so other lists sharing the
+        original dicts are left as they were.
+
+        Returns:
+            int: The token count of the messages afterwards.
+        """
+        budget = budget or self.history_tokens
+        total = sum(count_tokens(_content(message)) for message in messages)
+        if not budget or total <= budget:
+            return total
+
+        results = [
+            i for i, message in enumerate(messages)
+            if _content(message).startswith((OUTPUT_PREFIX, ERROR_PREFIX))
+        ]
+        older = results[:-self.keep_recent] if self.keep_recent else results
+        referenced = {
+            text
+            for message in messages
+            for attempt in _REFERENCE.findall(_content(message))
+            for text in self._rendered.get(int(attempt), ())
+        }
+        protected = {i for i in older if _content(messages[i]) in referenced}
+        excerpt = lambda text: elide(text, 80, self.head_ratio)
+        for shrink, skip in ((excerpt, set()), (self._placeholder, protected)):
+            for i in older:
+                if total <= budget:
+                    return total
+                if i in skip:
+                    continue
+                text = _content(messages[i])
+                prefix = OUTPUT_PREFIX if text.startswith(OUTPUT_PREFIX) else ERROR_PREFIX
+                shorter = prefix + shrink(text[len(prefix):])
+                if count_tokens(shorter) < count_tokens(text):
+                    total += count_tokens(shorter) - count_tokens(text)
+                    messages[i] = dict(messages[i])
+                    _set_content(messages[i], shorter)
+        return total
+
+    @staticmethod
+    def _placeholder(text: str) -> str:
+        if text.startswith("[Same ") or (text.startswith("[") and "omitted" in text):
+            return text
+        return f"[{count_tokens(text)} tokens omitted (sha1 {_digest(text)})]"
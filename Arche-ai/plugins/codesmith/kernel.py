@@ -0,0 +1,257 @@
+import codecs
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from plugins.codesmith.executor import ExecutionResult, _memory_error, _rss
+from plugins.codesmith.forkserver import apply_limits
+
+KERNEL_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernel_server.py")
+
+
+class PersistentKernel:
+    """
+    Long-lived interpreter that runs successive scripts in one namespace (POSIX only).
+
+    Variables, imports and loaded data of one script stay available to the next, like
+    cells of a Jupyter kernel. `run` has the same interface and limits as
+    `ScriptExecutor.run`: a script that exceeds its wall-clock time or output cap is
+    interrupted (KeyboardInterrupt, the state is kept), one that exceeds its CPU time gets
+    an exception, and if the kernel crashes, ignores the interrupt or exceeds its memory
+    limit it is killed and restarted with an empty namespace.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        cpu_time: Optional[float] = None,
+        max_memory: Optional[int] = 1024 * 1024 * 1024,
+        max_output: int = 1_000_000,
+        poll_interval: float = 0.1,
+        interrupt_grace: float = 2.0,
+        python: str = sys.executable,
+        on_output: Optional[Callable[[str, str], None]] = None,
+    ):
+        """
+        Initializes the kernel and starts its process.
+
+        Args:
+            timeout (float, optional): Wall-clock limit per script in seconds. None disables it.
+            cpu_time (float, optional): CPU-time limit per script in seconds. Defaults to `timeout`.
+            max_memory (int, optional): Memory limit of the kernel in bytes. None disables it.
+            max_output (int, optional): Maximum characters kept per stream and script.
+            poll_interval (float, optional): Seconds between limit checks.
+            interrupt_grace (float, optional): Seconds a script gets to stop after an interrupt before the kernel is restarted.
+            python (str, optional): Interpreter running the kernel.
+            on_output (Callable, optional): Called as `on_output(stream, text)` for every chunk of output.
+        """
+        if os.name != "posix":
+            raise OSError("PersistentKernel needs a POSIX system.")
+        self.timeout = timeout
+        self.cpu_time = cpu_time if cpu_time is not None else timeout
+        self.max_memory = max_memory
+        self.max_output = max_output
+        self.poll_interval = poll_interval
+        self.interrupt_grace = interrupt_grace
+        self.python = python
+        self.on_output = on_output
+        self.restarts = 0
+        self.process = None
+        self._cell = 0
+        self._lock = threading.Lock()
+        self.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> None:
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.process = subprocess.Popen(
+            [self.python, KERNEL_SERVER, str(child.fileno())],
+            pass_fds=(child.fileno(),),
+            stdin=subprocess.DEVNULL,  # Raises EOF error if a script asks for input
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+            preexec_fn=lambda: apply_limits(None, self.max_memory),
+        )
+        child.close()
+        self.control = parent
+
+    def close(self) -> None:
+        """Stops the kernel; its namespace is lost."""
+        if self.process is None:
+            return
+        self.control.close()
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._kill()
+        for pipe in (self.process.stdout, self.process.stderr):
+            pipe.close()
+        self.process = None
+
+    def restart(self) -> None:
+        """Starts a fresh kernel with an empty namespace."""
+        if self.process is not None:
+            self._kill()
+            self.close()
+        self.start()
+        self.restarts += 1
+
+    def _kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+        self.process.wait()
+
+    def _interrupt(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGINT)
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+
+    def run(self, script: str, cwd: Optional[str] = None) -> ExecutionResult:
+        """
+        Runs a script in the kernel's namespace.
+
+        Args:
+            script (str): Python source code.
+            cwd (str, optional): Working directory to switch to before running it.
+
+        Returns:
+            ExecutionResult: The captured output, return code and the limit hit, if any.
+        """
+        with self._lock:
+            if not self.alive:
+                self.restart()
+            self._cell += 1
+            request = {"code": script, "filename": f"<cell-{self._cell}>", "cpu_time": self.cpu_time, "cwd": cwd}
+            return self._run(request)
+
+    def _run(self, request: dict) -> ExecutionResult:
+        result = ExecutionResult()
+        start = time.monotonic()
+        decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")}
+        captured = {"stdout": [], "stderr": []}
+        sizes = {"stdout": 0, "stderr": 0}
+
+        def capture(stream, data):
+            text = decoders[stream].decode(data)
+            if self.on_output is not None and text:
+                self.on_output(stream, text)
+            room = self.max_output - sizes[stream]
+            if len(text) > room:
+                text = text[:max(room, 0)]
+                result.truncated = True
+            captured[stream].append(text)
+            sizes[stream] += len(text)
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.process.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(self.process.stderr, selectors.EVENT_READ, "stderr")
+        selector.register(self.control, selectors.EVENT_READ, "control")
+        reply, buffer, crashed, interrupted_at = None, b"", False, None
+        try:
+            self.control.sendall((json.dumps(request) + "\n").encode())
+            while reply is None and not crashed:
+                for key, _ in selector.select(timeout=self.poll_interval):
+                    if key.data == "control":
+                        data = self.control.recv(65536)
+                        if not data:
+                            crashed = True
+                        buffer += data
+                        if b"\n" in buffer:
+                            reply = json.loads(buffer.split(b"\n", 1)[0])
+                    else:
+                        data = os.read(key.fd, 65536)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                            crashed = True
+                        else:
+                            capture(key.data, data)
+
+                if reply is not None or crashed:
+                    break
+                now = time.monotonic()
+                if interrupted_at is not None:
+                    if now - interrupted_at > self.interrupt_grace:
+                        self._kill()
+                        crashed = True
+                    continue
+                if self.timeout and now - start > self.timeout:
+                    result.limit = "timeout"
+                elif result.truncated:
+                    result.limit = "output"
+                elif self.max_memory:
+                    rss = _rss(self.process.pid)
+                    result.max_rss = max(result.max_rss, rss)
+                    if rss > self.max_memory:
+                        result.limit = "memory"
+                        self._kill()
+                        crashed = True
+                        continue
+                if result.limit is not None:
+                    self._interrupt()
+                    interrupted_at = now
+        except OSError:
+            crashed = True
+        finally:
+            # Output written before the script finished is already in the pipes
+            if self.process.poll() is not None or crashed:
+                self._kill()
+            while selector.get_map():
+                events = selector.select(timeout=0)
+                if not events:
+                    break
+                for key, _ in events:
+                    if key.data == "control":
+                        selector.unregister(key.fileobj)
+                        continue
+                    data = os.read(key.fd, 65536)
+                    if data:
+                        capture(key.data, data)
+                    else:
+                        selector.unregister(key.fileobj)
+            selector.close()
+
+        result.duration = time.monotonic() - start
+        result.output = "".join(captured["stdout"])
+        result.error = "".join(captured["stderr"])
+        if reply is not None:
+            result.return_code = reply["code"]
+            result.limit = result.limit or reply.get("limit")
+        else:
+            result.return_code = self.process.returncode if self.process.returncode is not None else 1
+        if self.max_memory and result.limit is None and result.return_code != 0 and _memory_error(result.error):
+            result.limit = "memory"
+
+        notes = {
+            "timeout": f"Execution stopped: exceeded the wall-clock limit of {self.timeout}s.",
+            "cpu": f"Execution stopped: exceeded the CPU-time limit of {self.cpu_time}s.",
+            "memory": f"Execution stopped: exceeded the memory limit of {(self.max_memory or 0) // (1024 * 1024)} MB.",
+            "output": f"Execution stopped: output exceeded {self.max_output} characters.",
+        }
+        if result.limit is not None:
+            result.error += ("\n" if result.error else "") + notes[result.limit]
+        if crashed:
+            result.error += ("\n" if result.error else "") + "The session was restarted: variables from previous scripts were lost."
+            self.restart()
+        if result.return_code == 0 and (result.limit is not None or crashed):
+            result.return_code = 1
+        return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,97 @@
+"""
+Entry point of a CodeSmith persistent kernel (see `plugins.codesmith.kernel`).
+
+Runs scripts one after another in a single `__main__` namespace, so variables, imports
+and loaded data survive between them. Requests and completion messages are JSON lines on
+a control socket; the scripts write straight to this process's stdout and stderr.
+This file only imports the standard library.
+"""
+
+import builtins
+import json
+import linecache
+import os
+import signal
+import socket
+import sys
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows: no CPU-time limit
+    resource = None
+
+
+class CPULimitExceeded(BaseException):
+    """Raised inside a script when it exceeds its CPU-time limit (SIGXCPU)."""
+
+
+def _cpu_exceeded(signum, frame):
+    raise CPULimitExceeded()
+
+
+def _set_cpu_limit(cpu_time):
+    """Allows `cpu_time` more seconds of CPU from now (the limit is process-wide, so it is moved per script)."""
+    if resource is None:
+        return
+    soft = resource.RLIM_INFINITY
+    if cpu_time:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + cpu_time) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY and soft != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if soft != resource.RLIM_INFINITY else hard, hard))
+
+
+def _execute(request: dict, namespace: dict) -> dict:
+    """Runs one script in the shared namespace and returns its completion message."""
+    filename = request["filename"]
+    source = request["code"]
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    reply = {"code": 0}
+    signal.signal(signal.SIGINT, signal.default_int_handler)  # interrupts only reach running scripts
+    try:
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        _set_cpu_limit(request.get("cpu_time"))
+        exec(compile(source, filename, "exec"), namespace)
+    except SystemExit as e:
+        reply["code"] = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if e.code is not None and not isinstance(e.code, int):
+            print(e.code, file=sys.stderr)
+    except CPULimitExceeded:
+        reply.update(code=1, limit="cpu")
+    except BaseException as e:
+        # Only the script's own frames, like `python script.py` would show
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != filename:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        reply["code"] = 1
+    finally:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        _set_cpu_limit(None)
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    return reply
+
+
+def serve(fd: int) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _cpu_exceeded)
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    sys.argv = [""]
+    sock = socket.socket(fileno=fd)
+    reader = sock.makefile("rb")
+    for line in reader:
+        reply = _execute(json.loads(line), namespace)
+        sock.sendall((json.dumps(reply) + "\n").encode())
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
@@ -1,10 +1,146 @@
+import hashlib
 import json
 import os
+import tempfile
+import threading
+from importlib import resources
+from typing import Iterable, Optional
 
-PROMPTS_DIR = fr"{os.path.join(os.getcwd(), 'prompts', 'codesmith', 'prompts')}"
+import numpy as np
+
+from prompts.registry import prompt_registry
+from utils.embedding import HashingEmbedder
+from utils.paths import user_cache_dir
+from utils.tokens import count_tokens
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codesmith', 'prompts')
+EXAMPLES_CACHE_DIR = user_cache_dir("prompt_examples")
 def codesmithPrompt():
-    with open(os.path.join(PROMPTS_DIR, "codesmith.jinja2"), "r") as f:
-        return f.read()
-    
+    # Read once, then served from the registry's cache
+    return prompt_registry.get("codesmith/prompts/codesmith.jinja2").render()
+
+
+class ExampleStore:
+    """
+    Few-shot examples picked per task instead of a fixed block.
+
+    Examples are read from `prompts/examples/<name>.jsonl` (one `{"task", "response"}`
+    object per line, plus a `"tools"` list naming the tools or agents they use, so
+    that an example is only shown when those exist). Their tasks are embedded once with a `HashingEmbedder` into a matrix saved
+    next to the other runtime data and memory-mapped on later loads; the file name
+    includes a digest of the examples, so editing them rebuilds it. If the directory
+    cannot be written (e.g. a read-only home), the matrix is kept in memory.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        embedder: Optional[HashingEmbedder] = None,
+        cache_dir: Optional[str] = EXAMPLES_CACHE_DIR,
+    ):
+        """
+        Initializes the store.
+
+        Args:
+            name (str): Example set, e.g. "agent" or "network".
+            embedder (HashingEmbedder, optional): Embedder to use. Defaults to a 1024-dimension one.
+            cache_dir (str, optional): Directory of the embedding matrices. None keeps them in memory.
+        """
+        self.name = name
+        self.embedder = embedder or HashingEmbedder()
+        raw = resources.files("prompts").joinpath("examples", f"{name}.jsonl").read_text(encoding="utf-8")
+        self.examples = [json.loads(line) for line in raw.splitlines() if line.strip()]
+        self.tokens = [count_tokens(self.format(example)) for example in self.examples]
+        digest = hashlib.sha1(f"{self.embedder.dim}:{self.embedder.ngram_range}:{raw}".encode("utf-8")).hexdigest()[:12]
+        self.vectors = self._load_vectors(cache_dir, digest)
+
+    @staticmethod
+    def format(example: dict) -> str:
+        return f"Task: {example['task']}\nResponse:\n{json.dumps(example['response'])}"
+
+    def _load_vectors(self, cache_dir: Optional[str], digest: str) -> np.ndarray:
+        path = os.path.join(cache_dir, f"{self.name}-{digest}.npy") if cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                return np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                pass
+        vectors = self.embedder.embed(example["task"] for example in self.examples)
+        if path:
+            tmp_path = None
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(suffix=".npy", prefix=f"{self.name}-", dir=cache_dir)
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, vectors)
+                os.replace(tmp_path, path)
+                return np.load(path, mmap_mode="r")
+            except OSError:
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return vectors
+
+    def select(self, task: str, token_budget: int = 120, k: int = 3, available: Optional[Iterable[str]] = None) -> list:
+        """
+        Returns the examples nearest to a task, most similar first, within a token budget.
+
+        Args:
+            task (str): The task the prompt is built for.
+            token_budget (int, optional): Maximum tokens of the selected examples.
+            k (int, optional): Maximum number of examples.
+            available (Iterable[str], optional): Names of the tools (or agents) present. Examples
+                                                 needing anything else are skipped. None allows all.
+        """
+        if not self.examples or token_budget <= 0:
+            return []
+        scores = np.asarray(self.vectors @ self.embedder.embed_one(task))
+        available = None if available is None else {name.lower() for name in available}
+        selected, used = [], 0
+        for i in np.argsort(-scores, kind="stable"):
+            example = self.examples[i]
+            needs = {name.lower() for name in example.get("tools", [])}
+            if available is not None and not needs <= available:
+                continue
+            if used + self.tokens[i] > token_budget:
+                continue
+            selected.append(example)
+            used += self.tokens[i]
+            if len(selected) == k:
+                break
+        return selected
+
+    def render(self, task: str, token_budget: int = 120, k: int = 3, available: Optional[Iterable[str]] = None) -> str:
+        """Selected examples formatted for a prompt, separated by blank lines."""
+        return "\n\n".join(self.format(example) for example in self.select(task, token_budget, k, available))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def example_store(name: str) -> ExampleStore:
+    """Returns the process-wide store of an example set, built on first use."""
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = ExampleStore(name)
+        return _stores[name]
+
+
+def few_shot_examples(
+    name: str,
+    task: str,
+    token_budget: int = 120,
+    k: int = 3,
+    available: Optional[Iterable[str]] = None,
+    header: str = "",
+) -> str:
+    """
+    Renders the examples of set `name` nearest to a task, e.g. `few_shot_examples("agent", task)`,
+    preceded by `header` on its own line. Returns "" (without the header) when no example fits.
+    """
+    examples = example_store(name).render(task, token_budget, k, available)
+    return f"{header}\n{examples}" if examples and header else examples
+
+
 if __name__=="__main__":
     print(codesmithPrompt())
\ No newline at end of file
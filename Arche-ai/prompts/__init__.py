@@ -0,0 +1 @@
+from prompts.registry import PromptRegistry, PromptTemplate, RenderedPrompt, prompt_registry, render_prompt
\ No newline at end of file
@@ -0,0 +1,139 @@
+import string
+import threading
+from collections import OrderedDict
+from importlib import resources
+from typing import Optional
+
+from utils.tokens import count_tokens
+
+
+class RenderedPrompt(str):
+    """A rendered prompt: a plain string that also carries its precomputed token count."""
+
+    tokens: int
+
+    def __new__(cls, text: str):
+        prompt = super().__new__(cls, text)
+        prompt.tokens = count_tokens(text)
+        return prompt
+
+
+class PromptTemplate:
+    """
+    A prompt template compiled once: `str.format` fields are parsed at load time, and
+    renderings are cached per set of values, so a prompt rebuilt with the same agent
+    and tool set costs a dictionary lookup.
+    """
+
+    def __init__(self, name: str, source: str, static: bool = False, max_renders: int = 128):
+        """
+        Initializes the template.
+
+        Args:
+            name (str): Registry name of the template.
+            source (str): Template text. `{field}` placeholders, `{{`/`}}` for literal braces.
+            static (bool, optional): The text has no placeholders and is used as is (braces are literal).
+            max_renders (int, optional): Maximum number of cached renderings.
+        """
+        self.name = name
+        self.source = source
+        self.static = static
+        self.max_renders = max_renders
+        if static:
+            self.fields = ()
+            self._static = RenderedPrompt(source)
+        else:
+            self.fields = tuple(dict.fromkeys(
+                field.split(".")[0].split("[")[0]
+                for _, field, _, _ in string.Formatter().parse(source) if field
+            ))
+            self._static = RenderedPrompt(source.format()) if not self.fields else None
+        self._renders = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, **values) -> RenderedPrompt:
+        """
+        Renders the template. Values must be strings (or other hashables); missing fields raise KeyError.
+        """
+        if self._static is not None:
+            return self._static
+        key = tuple(values.get(field) for field in self.fields)
+        with self._lock:
+            prompt = self._renders.get(key)
+            if prompt is not None:
+                self._renders.move_to_end(key)
+                self.hits += 1
+                return prompt
+            self.misses += 1
+        prompt = RenderedPrompt(self.source.format(**values))
+        with self._lock:
+            self._renders[key] = prompt
+            while len(self._renders) > self.max_renders:
+                self._renders.popitem(last=False)
+        return prompt
+
+
+class PromptRegistry:
+    """
+    Loads prompt templates from the `prompts` package resources (independent of the
+    working directory), compiles each one once and serves cached renderings.
+    """
+
+    def __init__(self, package: str = "prompts"):
+        self.package = package
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: str, static: bool = False) -> PromptTemplate:
+        """Registers a template from a string, replacing any template with the same name."""
+        template = PromptTemplate(name, source, static=static)
+        with self._lock:
+            self._templates[name] = template
+        return template
+
+    def get(self, name: str, static: Optional[bool] = None) -> PromptTemplate:
+        """
+        Returns a template, loading `<name>` (or `<name>.txt`) from the package on first use.
+
+        Args:
+            name (str): Resource path relative to the package, e.g. "agent/planner".
+            static (bool, optional): Use the text as is, without placeholders. Defaults to
+                                     True for `.jinja2` files and False otherwise.
+        """
+        template = self._templates.get(name)
+        if template is not None:
+            return template
+        root = resources.files(self.package)
+        resource = root.joinpath(name)
+        if not resource.is_file():
+            resource = root.joinpath(f"{name}.txt")
+        source = resource.read_text(encoding="utf-8")
+        if static is None:
+            static = name.endswith(".jinja2")
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                template = self._templates[name] = PromptTemplate(name, source, static=static)
+        return template
+
+    def render(self, template: str, /, **values) -> RenderedPrompt:
+        return self.get(template).render(**values)
+
+    def metrics(self) -> dict:
+        """Returns the cached renderings, hits and misses of every loaded template."""
+        with self._lock:
+            templates = dict(self._templates)
+        return {
+            name: {"renders": len(t._renders), "hits": t.hits, "misses": t.misses}
+            for name, t in templates.items()
+        }
+
+
+prompt_registry = PromptRegistry()
+
+
+def render_prompt(template: str, /, **values) -> RenderedPrompt:
+    """Renders a template of the shared registry, e.g. `render_prompt("agent/planner", functions=...)`."""
+    return prompt_registry.render(template, **values)
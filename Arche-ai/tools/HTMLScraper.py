@@ -1,23 +1,97 @@
+import re
+import concurrent.futures
+from collections import deque
+from urllib.parse import urldefrag, urlsplit
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from bs4.element import Comment
+from tools.html_extract import PARSE_ERRORS, extract_text
+from tools.http_cache import HTTPCache
+
+class _HostScheduler:
+    """
+    Submits page fetches to a thread pool with at most `per_host` in flight per host.
+
+    URLs over a host's limit wait in a per-host queue and are submitted as that host's
+    fetches complete, so they never occupy a pool thread while waiting.
+    """
+
+    def __init__(self, executor, fetch, per_host):
+        self.executor = executor
+        self.fetch = fetch
+        self.per_host = max(per_host, 1)
+        self.queues = {}    # host -> deque of (url, tag) waiting for a slot
+        self.running = {}   # host -> fetches in flight
+        self.pending = {}   # future -> (url, tag, host)
+
+    def add(self, url, tag=None):
+        host = urlsplit(url).netloc.lower()
+        self.queues.setdefault(host, deque()).append((url, tag))
+        self._dispatch(host)
+
+    def _dispatch(self, host):
+        queue = self.queues.get(host)
+        while queue and self.running.get(host, 0) < self.per_host:
+            url, tag = queue.popleft()
+            self.running[host] = self.running.get(host, 0) + 1
+            self.pending[self.executor.submit(self.fetch, url)] = (url, tag, host)
+        if queue is not None and not queue:
+            del self.queues[host]
+
+    def completed(self):
+        """Yields (url, tag, future) as fetches complete; URLs may be added while iterating."""
+        while self.pending:
+            done, _ = concurrent.futures.wait(self.pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                url, tag, host = self.pending.pop(future)
+                self.running[host] -= 1
+                self._dispatch(host)
+                finished.append((url, tag, future))
+            yield from finished
+
 
 class HTMLContentScraper:
     """
     Scrapes a webpage and removes all CSS and JavaScript content.
     """
 
-    def __init__(self, headers=None):
+    def __init__(self, headers=None, timeout=15, max_bytes=2_000_000, max_workers=8, per_host=2, cache=None, index=None):
         """
         Initializes the scraper with optional custom headers.
 
         Args:
             headers (dict, optional): Custom headers for HTTP requests.
+            timeout (float, optional): Connect/read timeout in seconds for `extract_page`.
+            max_bytes (int, optional): Maximum number of body bytes read by `extract_page`.
+            max_workers (int, optional): Maximum number of concurrent requests in `scrape_many`/`crawl`.
+            per_host (int, optional): Maximum number of concurrent requests to a single host
+                                      within one `scrape_many`/`crawl` call.
+            cache (HTTPCache, optional): On-disk HTTP cache used by `extract_page`. Unchanged pages
+                                         are then served from disk (after a 304 when stale), and
+                                         their extracted text is reused without parsing.
+            index (LocalSearchIndex, optional): Offline search index every extracted page is added to,
+                                                e.g. `tools.local_search.default_index()` so that
+                                                `local_search` can answer from scraped pages. None disables it.
         """
 
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
         }
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.cache: HTTPCache = cache
+        self.index = index
+
+        # One pooled keep-alive session shared by every request of this scraper
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max(max_workers, per_host))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def scrape_and_clean_html(self,url):
         """
@@ -31,7 +105,7 @@ class HTMLContentScraper:
         """
 
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url, timeout=self.timeout)
             response.raise_for_status()
 
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -54,6 +128,209 @@ class HTMLContentScraper:
             print(f"Error during scraping: {e}")
             return None
 
+    def extract_page(self, url, markdown=True, keep_links=False, max_bytes=None):
+        """
+        Streams a webpage and extracts its readable main content in a single pass.
+
+        The body is read in chunks and parsed incrementally (lxml when installed,
+        `html.parser` otherwise), stopping after `max_bytes`. No tree is built and
+        no markup is returned.
+
+        Args:
+            url (str): The URL of the webpage to scrape.
+            markdown (bool, optional): Return markdown (headings, lists, code) instead of plain text.
+            keep_links (bool, optional): Keep links as [text](url) in the markdown.
+            max_bytes (int, optional): Overrides the scraper's byte cap.
+
+        Returns:
+            dict: 'url', 'title', 'text', 'links' and 'truncated' (True if the byte cap was hit),
+                  or None if an error occurs.
+        """
+        max_bytes = max_bytes or self.max_bytes
+        variant = f"{'markdown' if markdown else 'text'}{'+links' if keep_links else ''}:{max_bytes}"
+        try:
+            entry = self.cache.get(url) if self.cache is not None else None
+            if entry is not None and not entry.covers(max_bytes):
+                # Stored with a smaller byte cap: fetch the page again in full
+                entry = None
+            if entry is not None and entry.is_fresh():
+                return self._indexed(self._cached_page(entry, variant, markdown, keep_links, max_bytes))
+
+            headers = entry.conditional_headers() if entry is not None else {}
+            with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+                if response.status_code == 304 and entry is not None:
+                    entry = self.cache.revalidated(entry, response.headers)
+                    return self._indexed(self._cached_page(entry, variant, markdown, keep_links, max_bytes))
+                response.raise_for_status()
+                charset = re.search(r"charset=([\w-]+)", response.headers.get("Content-Type", ""))
+                state = {"read": 0, "truncated": False}
+
+                def chunks():
+                    for chunk in response.iter_content(chunk_size=16384):
+                        remaining = max_bytes - state["read"]
+                        if remaining <= 0:
+                            state["truncated"] = True
+                            return
+                        if len(chunk) > remaining:
+                            chunk = chunk[:remaining]
+                            state["truncated"] = True
+                        state["read"] += len(chunk)
+                        if received is not None:
+                            received.append(chunk)
+                        yield chunk
+
+                received = [] if self.cache is not None else None
+
+                extractor = extract_text(
+                    chunks(),
+                    encoding=charset.group(1) if charset else None,
+                    markdown=markdown,
+                    base_url=response.url,
+                    keep_links=keep_links,
+                )
+                page = {
+                    "url": response.url,
+                    "title": extractor.title,
+                    "text": extractor.text,
+                    "links": extractor.links,
+                    "truncated": state["truncated"],
+                }
+                if self.cache is not None:
+                    self.cache.store(
+                        url, response.url, response.headers, b"".join(received),
+                        derived={variant: page}, truncated=state["truncated"],
+                    )
+                return self._indexed(page)
+
+        except (requests.exceptions.RequestException, LookupError, OSError, *PARSE_ERRORS) as e:
+            print(f"Error during scraping: {e}")
+            return None
+
+    def _indexed(self, page):
+        """Adds an extracted page to the search index, if any (unchanged pages are skipped by the index)."""
+        if self.index is not None and page is not None:
+            self.index.add_page(page)
+        return page
+
+    def _cached_page(self, entry, variant, markdown, keep_links, max_bytes):
+        """Returns the extracted page of a cache entry, parsing the stored body only once per variant."""
+        page = entry.derived.get(variant)
+        if page is None:
+            body = entry.body()
+            extractor = extract_text(
+                [body[:max_bytes]],
+                encoding=entry.encoding,
+                markdown=markdown,
+                base_url=entry.url,
+                keep_links=keep_links,
+            )
+            page = {
+                "url": entry.url,
+                "title": extractor.title,
+                "text": extractor.text,
+                "links": extractor.links,
+                "truncated": len(body) > max_bytes or entry.truncated,
+            }
+            self.cache.add_derived(entry, variant, page)
+        return page
+
+    def extract_text(self, url, markdown=True, max_bytes=None):
+        """
+        Returns the readable main content of a webpage as markdown (or plain text),
+        or None if an error occurs. See `extract_page`.
+        """
+        page = self.extract_page(url, markdown=markdown, max_bytes=max_bytes)
+        if page is None:
+            return None
+        if page["title"] and markdown:
+            return f"# {page['title']}\n\n{page['text']}"
+        return page["text"]
+
+    def _scheduler(self, executor, markdown, keep_links):
+        fetch = lambda url: self.extract_page(url, markdown=markdown, keep_links=keep_links)
+        return _HostScheduler(executor, fetch, self.per_host)
+
+    def scrape_many(self, urls, markdown=True, keep_links=False):
+        """
+        Extracts many pages concurrently over pooled keep-alive connections.
+
+        At most `max_workers` requests run at once, and at most `per_host` per host.
+        Duplicate URLs are fetched once.
+
+        Args:
+            urls (Iterable[str]): The URLs to scrape.
+            markdown (bool, optional): Extract markdown instead of plain text.
+            keep_links (bool, optional): Keep links as [text](url) in the markdown.
+
+        Yields:
+            tuple: (url, page) as each page completes, where page is the dict returned by
+                   `extract_page`, or None if the page could not be fetched.
+        """
+        urls = list(dict.fromkeys(urldefrag(url)[0] for url in urls))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scheduler = self._scheduler(executor, markdown, keep_links)
+            for url in urls:
+                scheduler.add(url)
+            for url, _, future in scheduler.completed():
+                try:
+                    page = future.result()
+                except Exception as e:
+                    print(f"Error scraping {url}: {e}")
+                    page = None
+                yield url, page
+
+    def crawl(self, start_urls, max_depth=1, max_pages=20, same_domain=True, markdown=True):
+        """
+        Crawls outward from one or more URLs, following links up to a depth and page cap.
+
+        Pages are fetched concurrently (see `scrape_many` for the limits) and links of each
+        completed page are queued as soon as it arrives, without waiting for the rest of its level.
+
+        Args:
+            start_urls (str | Iterable[str]): The URL(s) to start from (depth 0).
+            max_depth (int, optional): How many links away from a start URL to follow. Defaults to 1.
+            max_pages (int, optional): Maximum number of pages fetched. Defaults to 20.
+            same_domain (bool, optional): Only follow links on the domains of the start URLs.
+            markdown (bool, optional): Extract markdown instead of plain text.
+
+        Yields:
+            tuple: (url, depth, page) as each page completes; page is None if it could not be fetched.
+        """
+        if isinstance(start_urls, str):
+            start_urls = [start_urls]
+        start_urls = [urldefrag(url)[0] for url in start_urls]
+        domains = {urlsplit(url).netloc.lower() for url in start_urls}
+        seen = set()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scheduler = self._scheduler(executor, markdown, False)
+
+            def submit(url, depth):
+                if url in seen or len(seen) >= max_pages:
+                    return
+                seen.add(url)
+                scheduler.add(url, depth)
+
+            for url in start_urls:
+                submit(url, 0)
+
+            for url, depth, future in scheduler.completed():
+                try:
+                    page = future.result()
+                except Exception as e:
+                    print(f"Error scraping {url}: {e}")
+                    page = None
+                if page is not None and depth < max_depth:
+                    for link in page["links"]:
+                        link = urldefrag(link)[0]
+                        parts = urlsplit(link)
+                        if parts.scheme not in ("http", "https"):
+                            continue
+                        if same_domain and parts.netloc.lower() not in domains:
+                            continue
+                        submit(link, depth + 1)
+                yield url, depth, page
+
 # Example Usage
 if __name__ == "__main__":
     target_url = "https://icrisstudio1.pythonanywhere.com/" 
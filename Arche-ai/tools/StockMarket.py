@@ -1,14 +1,65 @@
 import yfinance as yf
+import numpy as np
+import pandas as pd
 import datetime
+import time
+import concurrent.futures
+from typing import Optional
+from tools.cache import LRUCache, cache_policy, casefold_args
+from tools.price_store import PriceStore
+from tools import indicators
 
 class StockMarketInfo:
     """
     Provides stock market information using the yfinance library. 
     """
 
-    def __init__(self):
-        pass  
+    def __init__(self, max_tickers: int = 64, ticker_ttl: float = 60, store: Optional[PriceStore] = None):
+        """
+        Initializes the bounded cache of `yf.Ticker` objects.
+
+        A `Ticker` fetches its `.info` payload once and keeps it, so reusing it lets
+        the price and the company information share one request. Price fields are never
+        read from a payload older than the price's own cache TTL (see `_info`).
+
+        Args:
+            max_tickers (int, optional): Maximum number of cached `Ticker` objects.
+            ticker_ttl (float, optional): Seconds a `Ticker` (and its `.info` payload) is reused
+                                          for non-price fields.
+            store (PriceStore, optional): Local price-history store. When given, daily history is
+                                          synced incrementally and read from disk.
+        """
+        self.ticker_ttl = ticker_ttl
+        self.store = store
+        self._tickers = LRUCache(max_entries=max_tickers)
+
+    def _ticker(self, ticker: str) -> yf.Ticker:
+        """Returns a cached `yf.Ticker` for the symbol, creating it if needed."""
+        ticker = ticker.strip().upper()
+        stock = self._tickers.get("tickers", ticker)
+        if stock is None:
+            stock = yf.Ticker(ticker)
+            self._tickers.set("tickers", ticker, stock, ttl=self.ticker_ttl)
+        return stock
+
+    def _info(self, ticker: str, max_age: Optional[float] = None) -> dict:
+        """
+        Returns the `.info` payload of a symbol, fetched again (on a new `Ticker`) if it is
+        older than `max_age` seconds, so price fields are as fresh as their callers expect.
+        """
+        ticker = ticker.strip().upper()
+        entry = self._tickers.get("info", ticker)
+        if entry is None or (max_age is not None and time.time() - entry[0] > max_age):
+            fetched_at = time.time()
+            stock = self._tickers.get("tickers", ticker) if entry is None else None
+            if stock is None:
+                stock = yf.Ticker(ticker)  # a new Ticker does not reuse the previous payload
+                self._tickers.set("tickers", ticker, stock, ttl=self.ticker_ttl)
+            entry = (fetched_at, stock.info)
+            self._tickers.set("info", ticker, entry, ttl=self.ticker_ttl)
+        return entry[1]
 
+    @cache_policy(ttl=15, key=casefold_args)
     def get_stock_price(self, ticker: str) -> float:
         """
         Fetches and returns the current price of a given stock ticker.
@@ -20,12 +71,12 @@ class StockMarketInfo:
             float: The current stock price, or None if an error occurs.
         """
         try:
-            stock = yf.Ticker(ticker)
-            return stock.info.get('currentPrice', None)
+            return self._info(ticker, max_age=self.get_stock_price.cache_policy.ttl).get('currentPrice', None)
         except Exception as e:
             print(f"Error fetching stock price: {e}")
             return None
 
+    @cache_policy(ttl=3600, max_entries=64, key=casefold_args)
     def get_historical_data(self, ticker: str, period: str = "1y") -> yf.Ticker:
         """
         Retrieves historical stock data for a given period.
@@ -37,14 +88,19 @@ class StockMarketInfo:
 
         Returns:
             pandas.DataFrame: A DataFrame containing historical data (Open, High, Low, Close, Volume)
+                              With a `store`, the daily bars are read from disk; prices are
+                              adjusted for dividends and splits either way.
         """
         try:
-            stock = yf.Ticker(ticker)
+            if self.store is not None:
+                return self.store.get_frame(ticker, period)
+            stock = self._ticker(ticker)
             return stock.history(period=period)
         except Exception as e:
             print(f"Error fetching historical data: {e}")
             return None
 
+    @cache_policy(ttl=6 * 3600, key=casefold_args)
     def get_company_info(self, ticker: str) -> dict:
         """
         Returns basic company information.
@@ -57,12 +113,12 @@ class StockMarketInfo:
                   or None if an error occurs.
         """
         try:
-            stock = yf.Ticker(ticker)
-            return stock.info
+            return self._info(ticker)
         except Exception as e:
             print(f"Error fetching company information: {e}")
             return None
 
+    @cache_policy(ttl=600, key=casefold_args)
     def get_news(self, ticker: str, count=5) -> list:
         """
         Fetches recent news articles related to the stock ticker.
@@ -75,16 +131,19 @@ class StockMarketInfo:
             list: A list of dictionaries, where each dictionary represents a news article
                   and contains 'title', 'link', and 'published_at' keys.
         """
-        stock = yf.Ticker(ticker)
+        stock = self._ticker(ticker)
         news = stock.news
         return news[:count]
 
-    def get_stock_details(self, ticker: str) -> str:
+    @cache_policy(ttl=60, cache_if=lambda details: not details.startswith("Error"), key=casefold_args)
+    def get_stock_details(self, ticker: str, compact: bool = False) -> str:
         """
         Provides detailed information about a specific stock as a formatted string.
 
         Args:
             ticker (str): The stock symbol.
+            compact (bool, optional): Replace the business summary and news links with a
+                                      numeric technical digest (see `get_technical_digest`).
 
         Returns:
             str: A formatted string containing stock details, 
@@ -92,15 +151,32 @@ class StockMarketInfo:
         """
         try:
             ticker = ticker.upper()
-            stock = yf.Ticker(ticker)
+
+            # One `.info` payload, no older than the price TTL, gives both the company
+            # information and the price; news (and the digest) are fetched alongside it.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+                info_future = executor.submit(self._info, ticker, self.get_stock_price.cache_policy.ttl)
+                news_future = executor.submit(self.get_news, ticker)
+                digest_future = executor.submit(self.get_technical_digest, ticker) if compact else None
+                try:
+                    info = info_future.result()
+                except Exception as e:
+                    print(f"Error fetching company information: {e}")
+                    info = None
+                price = info.get('currentPrice') if info else None
+                news = news_future.result()
+                digest = digest_future.result() if compact else None
 
             # Price Information
-            price = self.get_stock_price(ticker)
             price_info = f"Current Price: ${price:.2f}" if price else "Price information not available."
 
             # Company Information
-            info = self.get_company_info(ticker)
-            if info:
+            if info and compact:
+                company_info = (
+                    f"Company: {info.get('longName', 'N/A')} | Sector: {info.get('sector', 'N/A')}"
+                    f" | Industry: {info.get('industry', 'N/A')}"
+                )
+            elif info:
                 company_info = f"""
                 Company: {info.get('longName', 'N/A')}
                 Sector: {info.get('sector', 'N/A')}
@@ -112,14 +188,25 @@ class StockMarketInfo:
                 company_info = "Company information not available."
 
             # Recent News
-            news = self.get_news(ticker)
-            if news:
+            if news and compact:
+                news_section = "--- Recent News ---\n" + "\n".join(f"- {article['title']}" for article in news)
+            elif news:
                 news_section = "\n--- Recent News ---\n" + "\n".join(
                     [f"- {article['title']} ({article['link']})" for article in news]
                 )
             else:
                 news_section = "No recent news found."
 
+            if compact:
+                return "\n".join([
+                    f"--- Stock Information ({ticker}) ---",
+                    price_info,
+                    company_info,
+                    "--- Technical Signals ---",
+                    digest or "Technical signals not available.",
+                    news_section,
+                ])
+
             # Combine all sections
             stock_details = f"""
             --- Stock Information ---
@@ -135,6 +222,200 @@ class StockMarketInfo:
         except Exception as e:
             return f"Error fetching stock details: {e}"
 
+    def get_indicators(self, tickers, period: str = "1y") -> Optional[tuple[list, dict]]:
+        """
+        Computes technical indicators for one or many tickers (see `tools.indicators.compute`).
+
+        A single ticker goes through `get_historical_data` (and the local store, if any);
+        several tickers share one bulk download.
+
+        Args:
+            tickers (list | str): The stock symbols, as a list or a comma separated string.
+            period (str, optional): The history used for the indicators. Defaults to "1y".
+
+        Returns:
+            tuple: (tickers, indicators), where each indicator is an array aligned with tickers,
+                   or None if no data could be fetched.
+        """
+        tickers = self._parse_tickers(tickers)
+        if len(tickers) == 1:
+            history = self.get_historical_data(tickers[0], period=period)
+            if history is None or history.empty:
+                return None
+            fields = [history[field].to_numpy(dtype=float)[:, None] for field in ("High", "Low", "Close")]
+        else:
+            history = self.get_historical_data_many(tickers, period=period)
+            if history is None:
+                return None
+            fields = [history[field].reindex(columns=tickers).to_numpy(dtype=float) for field in ("High", "Low", "Close")]
+        return tickers, indicators.compute(*fields)
+
+    @cache_policy(ttl=300, cache_if=lambda digest: not digest.startswith("Error"), key=casefold_args)
+    def get_technical_digest(self, tickers, period: str = "1y") -> str:
+        """
+        Provides a compact numeric digest of technical indicators (SMA, RSI, MACD, Bollinger
+        bands, ATR, returns and drawdown), one line per ticker.
+
+        Args:
+            tickers (list | str): The stock symbols, as a list or a comma separated string.
+            period (str, optional): The history used for the indicators. Defaults to "1y".
+
+        Returns:
+            str: The digest, or an error message if something goes wrong.
+        """
+        try:
+            result = self.get_indicators(tickers, period=period)
+            if result is None:
+                return "Error computing technical indicators: no data returned."
+            return indicators.digest(*result)
+        except Exception as e:
+            return f"Error computing technical indicators: {e}"
+
+    @staticmethod
+    def _parse_tickers(tickers) -> list:
+        """Accepts a list of symbols or a comma/space separated string and returns unique upper-case symbols."""
+        if isinstance(tickers, str):
+            tickers = tickers.replace(",", " ").split()
+        return list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+
+    @cache_policy(ttl=3600, max_entries=64, key=casefold_args)
+    def get_historical_data_many(self, tickers, period: str = "1y", interval: str = "1d"):
+        """
+        Retrieves historical data for many tickers with a single bulk download. Prices are
+        adjusted for dividends and splits, like `get_historical_data`, so indicators come
+        out the same whether a ticker is requested alone or with others.
+
+        Args:
+            tickers (list | str): The stock symbols, as a list or a comma separated string.
+            period (str, optional): The data period (e.g., "1mo", "1y", "5y", "max"). Defaults to "1y".
+            interval (str, optional): The bar size (e.g., "1d", "1wk"). Defaults to "1d".
+
+        Returns:
+            pandas.DataFrame: One frame aligned on the date index, with (field, ticker) columns
+                              such as ("Close", "AAPL"), or None if an error occurs.
+        """
+        tickers = self._parse_tickers(tickers)
+        try:
+            data = yf.download(tickers, period=period, interval=interval, group_by="column",
+                               auto_adjust=True, threads=True, progress=False)
+            if data is None or data.empty:
+                return None
+            if not isinstance(data.columns, pd.MultiIndex):
+                data.columns = pd.MultiIndex.from_product([data.columns, tickers])
+            return data
+        except Exception as e:
+            print(f"Error fetching historical data: {e}")
+            return None
+
+    @cache_policy(ttl=15, key=casefold_args)
+    def get_prices(self, tickers) -> dict:
+        """
+        Fetches the latest price of many tickers with a single bulk download.
+
+        Args:
+            tickers (list | str): The stock symbols, as a list or a comma separated string.
+
+        Returns:
+            dict: Maps each symbol to its latest price (None when unavailable).
+        """
+        tickers = self._parse_tickers(tickers)
+        data = self.get_historical_data_many(tickers, period="5d")
+        if data is None:
+            return {ticker: None for ticker in tickers}
+        closes = self._close_matrix(data, tickers, field="Close")
+        return {
+            ticker: float(column[~np.isnan(column)][-1]) if (~np.isnan(column)).any() else None
+            for ticker, column in zip(tickers, closes.T)
+        }
+
+    @staticmethod
+    def _close_matrix(data, tickers, field: str = "Adj Close") -> np.ndarray:
+        """Returns closes as a float matrix of shape (dates, tickers), falling back to raw closes."""
+        if field not in data.columns.get_level_values(0):
+            field = "Close"
+        return data[field].reindex(columns=tickers).to_numpy(dtype=float)
+
+    def summarize_many(self, tickers, period: str = "1y", periods_per_year: int = 252) -> dict:
+        """
+        Computes return and risk statistics for many tickers at once, vectorized with NumPy.
+
+        Args:
+            tickers (list | str): The stock symbols, as a list or a comma separated string.
+            period (str, optional): The data period. Defaults to "1y".
+            periods_per_year (int, optional): Bars per year, used to annualize. Defaults to 252 (daily bars).
+
+        Returns:
+            dict: 'tickers', and arrays aligned with them: 'last_price', 'total_return',
+                  'mean_return' and 'volatility' (annualized), plus the 'correlation' matrix
+                  of daily returns. None if no data could be fetched.
+        """
+        tickers = self._parse_tickers(tickers)
+        data = self.get_historical_data_many(tickers, period=period)
+        if data is None:
+            return None
+
+        closes = self._close_matrix(data, tickers)
+        valid = ~np.isnan(closes)
+        rows = np.arange(len(closes))[:, None]
+        first_row = np.where(valid, rows, len(closes)).min(axis=0)
+        last_row = np.where(valid, rows, -1).max(axis=0)
+        has_data = last_row >= 0
+        columns = np.arange(len(tickers))
+        first = np.where(has_data, closes[np.minimum(first_row, len(closes) - 1), columns], np.nan)
+        last = np.where(has_data, closes[np.maximum(last_row, 0), columns], np.nan)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = closes[1:] / closes[:-1] - 1.0
+            mean_return = np.nanmean(returns, axis=0) * periods_per_year
+            volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(periods_per_year)
+            complete = returns[~np.isnan(returns).any(axis=1)]
+            if len(complete) > 1:
+                correlation = np.atleast_2d(np.corrcoef(complete, rowvar=False))
+            else:
+                correlation = np.full((len(tickers), len(tickers)), np.nan)
+
+        return {
+            "tickers": tickers,
+            "last_price": last,
+            "total_return": last / first - 1.0,
+            "mean_return": mean_return,
+            "volatility": volatility,
+            "correlation": correlation,
+        }
+
+    @cache_policy(ttl=300, cache_if=lambda summary: not summary.startswith("Error"), key=casefold_args)
+    def get_portfolio_summary(self, tickers, period: str = "1y") -> str:
+        """
+        Provides a compact comparison of many tickers as a formatted string.
+
+        Args:
+            tickers (list | str): The stock symbols, as a list or a comma separated string.
+            period (str, optional): The data period. Defaults to "1y".
+
+        Returns:
+            str: One line per ticker with price, return and volatility, followed by the
+                 return correlation matrix, or an error message if something goes wrong.
+        """
+        try:
+            summary = self.summarize_many(tickers, period=period)
+            if summary is None:
+                return "Error fetching portfolio data: no data returned."
+
+            lines = [f"--- Portfolio Summary ({period}) ---",
+                     "Ticker | Last Price | Total Return | Ann. Return | Ann. Volatility"]
+            for i, ticker in enumerate(summary["tickers"]):
+                lines.append(
+                    f"{ticker} | {summary['last_price'][i]:.2f} | {summary['total_return'][i]:+.2%} | "
+                    f"{summary['mean_return'][i]:+.2%} | {summary['volatility'][i]:.2%}"
+                )
+            lines.append("--- Correlation of Returns ---")
+            lines.append("       " + " ".join(f"{t:>7}" for t in summary["tickers"]))
+            for ticker, row in zip(summary["tickers"], summary["correlation"]):
+                lines.append(f"{ticker:>7}" + " ".join(f"{value:7.2f}" for value in row))
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error fetching portfolio data: {e}"
+
 # Example Usage (Modified)
 if __name__ == "__main__":
     market_info = StockMarketInfo()
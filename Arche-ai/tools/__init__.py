@@ -3,4 +3,11 @@ from tools.web_search import web_search
 from tools.current_time import get_current_time
 from tools.own_tool import OwnTool
 from tools.HTMLScraper import HTMLContentScraper
-from tools.StockMarket import StockMarketInfo
\ No newline at end of file
+from tools.StockMarket import StockMarketInfo
+from tools.cache import CachePolicy, cache_policy, cache_metrics
+from tools.refresher import CacheRefresher
+from tools.price_store import PriceStore
+from tools.http_cache import HTTPCache
+from tools.web_search import multi_search, multi_web_search
+from tools.local_search import LocalSearchIndex, local_search, local_first_search
+from tools.tool_index import ToolIndex
\ No newline at end of file
@@ -0,0 +1,366 @@
+import copy
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU store with per-entry expiry.
+
+    Entries live under a namespace so that several tools can share one store
+    while each keeps its own entry limit.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Initializes the store.
+
+        Args:
+            max_entries (int): Maximum number of entries across all namespaces.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._namespaces = {}
+        self._lock = threading.RLock()
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        """
+        Returns a live entry and marks it as recently used.
+
+        Args:
+            namespace (str): The namespace of the entry.
+            key (Any): The (hashable) key of the entry.
+            default (Any, optional): Returned when the entry is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(namespace, key)
+                return default
+            self._entries.move_to_end((namespace, key))
+            self._namespaces[namespace].move_to_end(key)
+            return value
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> None:
+        """
+        Stores an entry, evicting the least recently used ones when full.
+
+        Args:
+            namespace (str): The namespace of the entry.
+            key (Any): The (hashable) key of the entry.
+            value (Any): The value to store.
+            ttl (float, optional): Seconds until the entry expires. None never expires.
+            max_entries (int, optional): Entry limit for this namespace.
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            keys = self._namespaces.setdefault(namespace, OrderedDict())
+            self._entries[(namespace, key)] = (expires_at, value)
+            self._entries.move_to_end((namespace, key))
+            keys[key] = None
+            keys.move_to_end(key)
+
+            if max_entries is not None:
+                while len(keys) > max_entries:
+                    self._remove(namespace, next(iter(keys)))
+            while len(self._entries) > self.max_entries:
+                oldest_namespace, oldest_key = next(iter(self._entries))
+                self._remove(oldest_namespace, oldest_key)
+
+    def expires_in(self, namespace: str, key: Any) -> Optional[float]:
+        """
+        Returns the seconds left before an entry expires, or None if it is missing.
+        """
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            expires_at = entry[0]
+            return float("inf") if expires_at is None else expires_at - time.time()
+
+    def delete(self, namespace: str, key: Any) -> None:
+        with self._lock:
+            self._remove(namespace, key)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """
+        Drops every entry, or only the entries of one namespace.
+        """
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._namespaces.clear()
+                return
+            for key in list(self._namespaces.get(namespace, ())):
+                self._remove(namespace, key)
+
+    def _remove(self, namespace, key):
+        self._entries.pop((namespace, key), None)
+        keys = self._namespaces.get(namespace)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._namespaces[namespace]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    Optional on-disk tier: one pickle file per entry, grouped by namespace.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, namespace: str, key: Any) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, namespace, f"{digest}.pkl")
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                expires_at, stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return default
+        if stored_key != key:
+            return default
+        if expires_at is not None and expires_at <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return default
+        return value
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        path = self._path(namespace, key)
+        expires_at = time.time() + ttl if ttl is not None else None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((expires_at, key, value), f)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            print(f"Error writing disk cache entry: {e}")
+
+
+# Store shared by every cache policy that does not bring its own.
+shared_store = LRUCache()
+
+# Every policy created in this process, for `cache_metrics()`.
+_policies = []
+_policies_lock = threading.Lock()
+
+
+def _args_key(args: tuple, kwargs: dict, text: Optional[Callable[[str], str]] = None) -> tuple:
+    """Builds a hashable key from call arguments, passing every string through `text` if given."""
+    def normalize(value):
+        if isinstance(value, str):
+            return text(value) if text is not None else value
+        if isinstance(value, (list, tuple)):
+            return tuple(normalize(v) for v in value)
+        if isinstance(value, dict):
+            return tuple(sorted((str(k), normalize(v)) for k, v in value.items()))
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted((normalize(v) for v in value), key=repr))
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            return repr(value)
+
+    return normalize(args), normalize(kwargs)
+
+
+def exact_args(*args, **kwargs) -> tuple:
+    """Builds a hashable key from call arguments, keeping strings exactly as given."""
+    return _args_key(args, kwargs)
+
+
+def normalize_args(*args, **kwargs) -> tuple:
+    """
+    Builds a hashable key from call arguments.
+
+    Whitespace in strings is collapsed, so that `web_search(" python  docs")` and
+    `web_search("python docs")` share an entry. Case is kept (URLs, paths and code
+    are case-sensitive); see `casefold_args`.
+    """
+    return _args_key(args, kwargs, lambda value: " ".join(value.split()))
+
+
+def casefold_args(*args, **kwargs) -> tuple:
+    """
+    Like `normalize_args`, but also lower-cases strings, so that `get_weather("London")`
+    and `get_weather("london")` share an entry. For tools whose arguments are case-insensitive.
+    """
+    return _args_key(args, kwargs, lambda value: " ".join(value.split()).lower())
+
+
+_IMMUTABLE = (str, bytes, int, float, complex, bool, type(None), frozenset)
+
+
+def _detached(value: Any) -> Any:
+    """Returns a copy of a mutable value (dict, list, DataFrame, array...) so callers cannot change the cached one."""
+    if isinstance(value, _IMMUTABLE) or (isinstance(value, tuple) and all(isinstance(v, _IMMUTABLE) for v in value)):
+        return value
+    if hasattr(value, "copy") and not isinstance(value, (dict, list, set)):
+        try:
+            return value.copy()  # pandas / NumPy copies are deep by default
+        except TypeError:
+            pass
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        return value
+
+
+class CachePolicy:
+    """
+    Freshness policy for the results of one tool.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 256,
+        key: Optional[Callable[..., Any]] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        disk_dir: Optional[str] = None,
+        store: Optional[LRUCache] = None,
+        name: Optional[str] = None,
+        copy_values: bool = True,
+    ):
+        """
+        Initializes the policy.
+
+        Args:
+            ttl (float): Seconds a result stays fresh.
+            max_entries (int, optional): Maximum number of results kept for this tool.
+            key (Callable, optional): Builds the cache key from the call arguments.
+                                      Defaults to `normalize_args`; `casefold_args` also ignores case.
+            cache_if (Callable, optional): Decides whether a result may be cached.
+                                           Defaults to caching everything except None.
+            disk_dir (str, optional): Directory of the on-disk tier. Disabled when None.
+            store (LRUCache, optional): In-memory store. Defaults to `shared_store`.
+            name (str, optional): Namespace of the entries. Defaults to the tool name.
+            copy_values (bool, optional): Store and return copies of mutable results (dicts, lists,
+                                          DataFrames...), so a caller modifying one does not change
+                                          the cached entry. Disable only for results nobody modifies.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.key = key or normalize_args
+        self.cache_if = cache_if or (lambda value: value is not None)
+        self.disk = DiskCache(disk_dir) if disk_dir else None
+        self.store = store or shared_store
+        self.name = name
+        self.copy_values = copy_values
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with _policies_lock:
+            _policies.append(self)
+
+    def get(self, key: Any) -> Any:
+        """
+        Looks a key up in memory, then on disk. Returns `MISSING` on a miss.
+        """
+        value = self.store.get(self.name, key, MISSING)
+        if value is not MISSING:
+            with self._lock:
+                self.hits += 1
+            return _detached(value) if self.copy_values else value
+
+        if self.disk is not None:
+            value = self.disk.get(self.name, key, MISSING)
+            if value is not MISSING:
+                self.store.set(self.name, key, value, ttl=self.ttl, max_entries=self.max_entries)
+                with self._lock:
+                    self.disk_hits += 1
+                return _detached(value) if self.copy_values else value
+
+        with self._lock:
+            self.misses += 1
+        return MISSING
+
+    def set(self, key: Any, value: Any) -> None:
+        if not self.cache_if(value):
+            return
+        if self.copy_values:
+            value = _detached(value)
+        self.store.set(self.name, key, value, ttl=self.ttl, max_entries=self.max_entries)
+        if self.disk is not None:
+            self.disk.set(self.name, key, value, ttl=self.ttl)
+
+    def expires_in(self, key: Any) -> Optional[float]:
+        """
+        Returns the seconds left before an in-memory entry expires, or None if it is missing.
+        """
+        return self.store.expires_in(self.name, key)
+
+    def invalidate(self, key: Any = MISSING) -> None:
+        """
+        Drops one key, or every entry of this policy when no key is given.
+        """
+        if key is MISSING:
+            self.store.clear(self.name)
+        else:
+            self.store.delete(self.name, key)
+
+    def metrics(self) -> dict:
+        """
+        Returns hit/miss counters and the hit rate of this policy.
+        """
+        with self._lock:
+            hits, disk_hits, misses = self.hits, self.disk_hits, self.misses
+        total = hits + disk_hits + misses
+        return {
+            "hits": hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": (hits + disk_hits) / total if total else 0.0,
+            "ttl": self.ttl,
+        }
+
+
+def cache_policy(ttl: float, **options) -> Callable:
+    """
+    Decorator attaching a default `CachePolicy` to a tool function.
+
+    `OwnTool` picks it up unless it is given a policy of its own.
+
+    Example:
+        @cache_policy(ttl=600)
+        def get_weather(location): ...
+    """
+    def decorator(func):
+        options.setdefault("name", f"{func.__module__}.{func.__qualname__}")
+        func.cache_policy = CachePolicy(ttl=ttl, **options)
+        return func
+    return decorator
+
+
+def cache_metrics() -> dict:
+    """
+    Returns the metrics of every cache policy, keyed by policy name.
+    """
+    with _policies_lock:
+        policies = list(_policies)
+    return {policy.name: policy.metrics() for policy in policies if policy.name}
@@ -0,0 +1,226 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Optional
+from urllib.parse import urljoin
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, the standard library parser is used instead
+    etree = None
+
+# Errors lxml can raise on a body it cannot make sense of (e.g. an empty one)
+PARSE_ERRORS = (etree.ParserError, etree.XMLSyntaxError) if etree is not None else ()
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "head"}
+BOILERPLATE_TAGS = {"nav", "footer", "aside", "form"}
+MAIN_TAGS = {"main", "article"}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "li", "ul", "ol", "dl", "dt", "dd",
+    "table", "tr", "blockquote", "pre", "figure", "figcaption", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADINGS = {"h1": "#", "h2": "##", "h3": "###", "h4": "####", "h5": "#####", "h6": "######"}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed", "source", "track", "wbr"}
+
+_SPACES = re.compile(r"[ \t\r\n\f\v]+")
+
+
+class TextExtractor:
+    """
+    Streaming parser target that turns HTML into readable text or markdown in one pass.
+
+    It follows the lxml parser-target interface (`start`, `end`, `data`, `comment`,
+    `close`), so it can be fed by lxml's HTML parser or by the standard library
+    `html.parser` through `_StdlibFeeder`. No tree is built: scripts, styles and
+    boilerplate (nav, footer, aside, forms) are skipped as they stream past, and if
+    the page has a <main> or <article>, only that content is kept.
+    """
+
+    def __init__(self, markdown: bool = True, base_url: Optional[str] = None, keep_links: bool = False):
+        """
+        Initializes the extractor.
+
+        Args:
+            markdown (bool, optional): Emit markdown headings, list items and code blocks. Defaults to True.
+            base_url (str, optional): Used to resolve relative links in `links`.
+            keep_links (bool, optional): Render links as [text](url) in markdown output.
+        """
+        self.markdown = markdown
+        self.base_url = base_url
+        self.keep_links = keep_links
+
+        self.title = ""
+        self.links = []
+        self._in_title = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._pre_depth = 0
+        self._href_stack = []
+        self._blocks = []  # (text, inside_main)
+        self._current = []
+
+    # Parser-target interface
+
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "title":
+            self._in_title = True
+        if tag == "body":
+            self._skip_depth = 0  # an unclosed <head> ends where the body starts
+        href = self._resolve(attrib.get("href")) if tag == "a" else None
+        if href:
+            self.links.append(href)  # navigation links are kept for crawling, even if their text is not
+        if self._skip_depth or tag in SKIP_TAGS or tag in BOILERPLATE_TAGS:
+            if tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+
+        if tag in MAIN_TAGS:
+            self._main_depth += 1
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag == "pre":
+            self._pre_depth += 1
+            if self.markdown:
+                self._current.append("```\n")
+        elif self.markdown and tag in HEADINGS:
+            self._current.append(HEADINGS[tag] + " ")
+        elif self.markdown and tag == "li":
+            self._current.append("- ")
+        elif tag == "a":
+            self._href_stack.append(href)
+            if href and self.markdown and self.keep_links:
+                self._current.append("[")
+
+    def end(self, tag):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "title":
+            self._in_title = False
+        if self._skip_depth:
+            if tag not in VOID_TAGS:
+                self._skip_depth -= 1
+            return
+
+        if tag == "a" and self._href_stack:
+            href = self._href_stack.pop()
+            if href and self.markdown and self.keep_links:
+                self._current.append(f"]({href})")
+        if tag == "pre":
+            self._pre_depth = max(self._pre_depth - 1, 0)
+            if self.markdown:
+                self._current.append("\n```")
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in MAIN_TAGS:
+            self._main_depth = max(self._main_depth - 1, 0)
+
+    def data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._skip_depth or not data:
+            return
+        self._current.append(data if self._pre_depth else _SPACES.sub(" ", data))
+
+    def comment(self, text):
+        pass
+
+    def close(self) -> str:
+        self._flush()
+        in_main = [text for text, inside in self._blocks if inside]
+        blocks = in_main or [text for text, _ in self._blocks]
+        return "\n\n".join(blocks)
+
+    # Helpers
+
+    def _resolve(self, href):
+        if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
+            return None
+        return urljoin(self.base_url, href) if self.base_url else href
+
+    def _flush(self):
+        if not self._current:
+            return
+        text = "".join(self._current)
+        self._current = []
+        if not self._pre_depth:
+            text = text.strip()
+        if text and not re.fullmatch(r"[#\-\s\[\]]*", text):
+            self._blocks.append((text, self._main_depth > 0))
+
+
+class _StdlibFeeder(HTMLParser):
+    """Adapts `html.parser` callbacks to a parser target."""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+        if tag in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+
+def extract_text(
+    chunks: Iterable[bytes],
+    encoding: Optional[str] = None,
+    markdown: bool = True,
+    base_url: Optional[str] = None,
+    keep_links: bool = False,
+    parser: str = "auto",
+) -> TextExtractor:
+    """
+    Extracts readable text from a stream of HTML byte chunks in a single pass.
+
+    Args:
+        chunks (Iterable[bytes]): The HTML body, e.g. `response.iter_content(...)`.
+        encoding (str, optional): Declared encoding of the body. Defaults to utf-8
+                                  (lxml detects <meta charset> on its own).
+        markdown (bool, optional): Emit markdown instead of plain text. Defaults to True.
+        base_url (str, optional): Used to resolve relative links.
+        keep_links (bool, optional): Render links as [text](url) in markdown output.
+        parser (str, optional): "lxml", "html.parser" or "auto" (lxml when installed).
+
+    Returns:
+        TextExtractor: The finished extractor; `.text`, `.title` and `.links` hold the results.
+    """
+    target = TextExtractor(markdown=markdown, base_url=base_url, keep_links=keep_links)
+    use_lxml = etree is not None and parser in ("auto", "lxml")
+
+    if use_lxml:
+        feeder = etree.HTMLParser(target=target, encoding=encoding, remove_comments=True)
+        try:
+            for chunk in chunks:
+                if chunk:
+                    feeder.feed(chunk)
+            target.text = feeder.close()
+        except PARSE_ERRORS:
+            # Empty or whitespace-only body: keep whatever was extracted, usually nothing
+            target.text = target.close()
+    else:
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        feeder = _StdlibFeeder(target)
+        for chunk in chunks:
+            if chunk:
+                feeder.feed(decoder.decode(chunk))
+        feeder.feed(decoder.decode(b"", final=True))
+        feeder.close()
+        target.text = target.close()
+
+    target.title = _SPACES.sub(" ", target.title).strip()
+    return target
@@ -0,0 +1,288 @@
+import email.utils
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+
+def parse_cache_control(value: str) -> dict:
+    """Parses a Cache-Control header into a dict, e.g. {'max-age': '60', 'no-cache': True}."""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else True
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CacheEntry:
+    """
+    Metadata of one cached response. The body and derived outputs are stored next to it.
+    """
+
+    def __init__(self, meta: dict, body_path: str):
+        self.meta = meta
+        self.body_path = body_path
+        self._body = None  # kept in memory once the entry is dropped from disk
+
+    @property
+    def url(self) -> str:
+        return self.meta["final_url"]
+
+    @property
+    def encoding(self) -> Optional[str]:
+        match = re.search(r"charset=([\w-]+)", self.meta.get("content_type") or "")
+        return match.group(1) if match else None
+
+    @property
+    def truncated(self) -> bool:
+        """True if the body was cut at a byte cap, so it is not the whole response."""
+        return bool(self.meta.get("truncated"))
+
+    def covers(self, max_bytes: int) -> bool:
+        """True if the stored body holds the first `max_bytes` bytes of the response."""
+        return not self.truncated or self.meta.get("size", 0) >= max_bytes
+
+    @property
+    def derived(self) -> dict:
+        return self.meta.setdefault("derived", {})
+
+    def is_fresh(self) -> bool:
+        if self.meta.get("no_cache"):
+            return False
+        return time.time() < self.meta.get("fetched_at", 0) + self.meta.get("max_age", 0)
+
+    def conditional_headers(self) -> dict:
+        """Returns If-None-Match / If-Modified-Since headers to revalidate this entry."""
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        return headers
+
+    def body(self) -> bytes:
+        if self._body is not None:
+            return self._body
+        with open(self.body_path, "rb") as f:
+            return f.read()
+
+
+class HTTPCache:
+    """
+    On-disk HTTP cache for scraped pages.
+
+    Each URL is stored as `<sha256>.body` (the raw response body) and `<sha256>.json`
+    (validators, freshness and derived outputs such as the extracted text), so that an
+    unchanged page costs a 304 (or nothing, while fresh) and no re-parsing.
+    Cache-Control `no-store`, `no-cache` and `max-age` are honoured, and the least
+    recently used entries are evicted once the bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, directory: str = os.path.join("data", "http_cache"), max_bytes: int = 200_000_000, default_max_age: float = 0):
+        """
+        Initializes the cache.
+
+        Args:
+            directory (str, optional): Directory holding the cache files. Created if missing.
+            max_bytes (int, optional): Maximum total size of the cached bodies.
+            default_max_age (float, optional): Freshness in seconds for responses without
+                                               Cache-Control/Expires/Last-Modified. 0 always revalidates.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_max_age = default_max_age
+        self._lock = threading.Lock()
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+        return f"{base}.body", f"{base}.json"
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """
+        Returns the cached entry of a URL (fresh or stale), or None.
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            os.utime(meta_path)  # last access, for eviction
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not os.path.exists(body_path):
+            return None
+        return CacheEntry(meta, body_path)
+
+    def _max_age(self, headers) -> Optional[float]:
+        """Seconds a response stays fresh, or None if it must not be stored."""
+        directives = parse_cache_control(headers.get("Cache-Control", ""))
+        if "no-store" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0.0
+        if "max-age" in directives:
+            try:
+                return max(float(directives["max-age"]) - float(headers.get("Age", 0) or 0), 0.0)
+            except ValueError:
+                return 0.0
+        expires = _http_date(headers.get("Expires"))
+        date = _http_date(headers.get("Date")) or time.time()
+        if expires is not None:
+            return max(expires - date, 0.0)
+        last_modified = _http_date(headers.get("Last-Modified"))
+        if last_modified is not None:
+            # Heuristic freshness: 10% of the document's age, at most a day
+            return min(max(date - last_modified, 0.0) * 0.1, 86400.0)
+        return float(self.default_max_age)
+
+    def _write_meta(self, meta_path: str, meta: dict) -> None:
+        tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def store(
+        self,
+        url: str,
+        final_url: str,
+        headers,
+        body: bytes,
+        derived: Optional[dict] = None,
+        truncated: bool = False,
+    ) -> Optional[CacheEntry]:
+        """
+        Stores a 200 response unless it is marked `no-store`.
+
+        Args:
+            url (str): The requested URL (the cache key).
+            final_url (str): The URL after redirects.
+            headers: The response headers.
+            body (bytes): The raw body.
+            derived (dict, optional): Outputs computed from the body, keyed by variant name.
+            truncated (bool, optional): The body was cut at a byte cap.
+
+        Returns:
+            CacheEntry: The stored entry, or None if the response may not be cached.
+        """
+        max_age = self._max_age(headers)
+        if max_age is None:
+            return None
+        directives = parse_cache_control(headers.get("Cache-Control", ""))
+        meta = {
+            "url": url,
+            "final_url": final_url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+            "no_cache": "no-cache" in directives,
+            "fetched_at": time.time(),
+            "max_age": max_age,
+            "size": len(body),
+            "truncated": truncated,
+            "derived": derived or {},
+        }
+        body_path, meta_path = self._paths(url)
+        with self._lock:
+            old_size = self._entry_size(meta_path)
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+            self._write_meta(meta_path, meta)
+            if self._size is not None:
+                self._size += len(body) - old_size
+            self._evict()
+        return CacheEntry(meta, body_path)
+
+    def revalidated(self, entry: CacheEntry, headers) -> CacheEntry:
+        """
+        Refreshes an entry after a 304 Not Modified response. Cache-Control sent with the
+        304 replaces the stored directives: `no-cache` makes the entry revalidate on every
+        use, and `no-store` drops it from disk (the returned entry still serves this response).
+        """
+        max_age = self._max_age(headers)
+        entry.meta["fetched_at"] = time.time()
+        entry.meta["max_age"] = max_age or 0.0
+        if headers.get("Cache-Control") is not None:
+            entry.meta["no_cache"] = "no-cache" in parse_cache_control(headers["Cache-Control"])
+        for header, key in (("ETag", "etag"), ("Last-Modified", "last_modified")):
+            if headers.get(header):
+                entry.meta[key] = headers[header]
+        body_path, meta_path = self._paths(entry.meta["url"])
+        with self._lock:
+            if max_age is None:
+                entry._body = entry.body()
+                entry.meta["no_store"] = True
+                for path in (body_path, meta_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                if self._size is not None:
+                    self._size -= len(entry._body)
+            else:
+                self._write_meta(meta_path, entry.meta)
+        return entry
+
+    def add_derived(self, entry: CacheEntry, variant: str, output) -> None:
+        """
+        Stores an output computed from the body (e.g. the extracted text) next to it.
+        """
+        entry.derived[variant] = output
+        if entry.meta.get("no_store"):
+            return
+        with self._lock:
+            self._write_meta(self._paths(entry.meta["url"])[1], entry.meta)
+
+    def _entry_size(self, meta_path: str) -> int:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("size", 0))
+        except (OSError, ValueError):
+            return 0
+
+    def _evict(self) -> None:
+        if self._size is None:
+            self._size = sum(
+                os.path.getsize(os.path.join(self.directory, name))
+                for name in os.listdir(self.directory) if name.endswith(".body")
+            )
+        if self._size <= self.max_bytes:
+            return
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                meta_path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(meta_path), meta_path))
+                except OSError:
+                    continue
+        for _, meta_path in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            body_path = meta_path[:-len(".json")] + ".body"
+            try:
+                size = os.path.getsize(body_path)
+                os.remove(body_path)
+                self._size -= size
+            except OSError:
+                pass
+            try:
+                os.remove(meta_path)
+            except OSError:
+                pass
@@ -0,0 +1,221 @@
+"""
+Vectorized technical indicators.
+
+Every function takes arrays shaped (dates,) or (dates, tickers) and works along
+the first axis, so one call covers a whole history for many tickers at once.
+Leading values without enough history are NaN.
+"""
+
+import numpy as np
+
+
+def _as_2d(values) -> tuple[np.ndarray, bool]:
+    x = np.asarray(values, dtype=float)
+    return (x[:, None], True) if x.ndim == 1 else (x, False)
+
+
+def _restore(x: np.ndarray, squeeze: bool) -> np.ndarray:
+    return x[:, 0] if squeeze else x
+
+
+def ffill(values) -> np.ndarray:
+    """Forward-fills NaN gaps (e.g. a ticker not trading on a date the others traded)."""
+    x, squeeze = _as_2d(values)
+    rows = np.where(~np.isnan(x), np.arange(len(x))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = x[rows, np.arange(x.shape[1])]
+    return _restore(filled, squeeze)
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if len(x) < window:
+        return out
+    csum = np.cumsum(np.nan_to_num(x), axis=0)
+    out[window - 1] = csum[window - 1]
+    out[window:] = csum[window:] - csum[:-window]
+    # A window touching a NaN is undefined
+    nan_count = np.cumsum(np.isnan(x), axis=0)
+    bad = nan_count[window - 1:] - np.vstack([np.zeros((1, x.shape[1])), nan_count[:-window]]) > 0
+    out[window - 1:][bad] = np.nan
+    return out
+
+
+def sma(values, window: int) -> np.ndarray:
+    """Simple moving average."""
+    x, squeeze = _as_2d(values)
+    return _restore(_rolling_sum(x, window) / window, squeeze)
+
+
+def ema(values, span: int = None, alpha: float = None) -> np.ndarray:
+    """
+    Exponential moving average, seeded with the first valid value. NaN rows keep the
+    previous value.
+
+    Computed in closed form: y_t = (1 - alpha)^k_t * (y_0 + sum(alpha * x_s / (1 - alpha)^k_s)),
+    with k counting the valid values, as one cumulative sum per block of rows. Blocks
+    are short enough that (1 - alpha)^-k stays far from overflowing (a few thousand
+    rows for usual spans), so a typical history is a single block.
+
+    Args:
+        values: Prices shaped (dates,) or (dates, tickers).
+        span (int, optional): The EMA span; alpha = 2 / (span + 1).
+        alpha (float, optional): Smoothing factor, used instead of `span` (1 / n gives Wilder smoothing).
+    """
+    x, squeeze = _as_2d(values)
+    alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+    if alpha >= 1.0:
+        return _restore(ffill(x), squeeze)
+    decay = -np.log1p(-alpha)
+    block_rows = max(1, int(50.0 / decay))  # keeps exp(decay * k) below ~5e21
+    out = np.empty_like(x)
+    prev = np.full(x.shape[1], np.nan)
+    for start in range(0, len(x), block_rows):
+        block = x[start:start + block_rows]
+        valid = ~np.isnan(block)
+        has_prev = ~np.isnan(prev)
+        count = np.cumsum(valid, axis=0)
+        # Without a carried value, the first valid one is the seed: weight 1, exponent 0
+        k = np.where(has_prev, count, count - 1)
+        seed = valid & ~has_prev & (count == 1)
+        weight = np.where(seed, 1.0, np.where(valid, alpha, 0.0))
+        terms = np.where(valid, block, 0.0) * weight * np.exp(decay * k)
+        y = (np.cumsum(terms, axis=0) + np.where(has_prev, prev, 0.0)) * np.exp(-decay * k)
+        y[k < 0] = np.nan
+        out[start:start + block_rows] = y
+        prev = y[-1]
+    return _restore(out, squeeze)
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing, in [0, 100]."""
+    x, squeeze = _as_2d(close)
+    delta = np.vstack([np.full((1, x.shape[1]), np.nan), np.diff(x, axis=0)])
+    gain = ema(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), alpha=1.0 / period)
+    loss = ema(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), alpha=1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    out[:period] = np.nan
+    return _restore(out, squeeze)
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the MACD line, its signal line and the histogram."""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    signal_line = ema(line, span=signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, window: int = 20, num_std: float = 2.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the middle, upper and lower Bollinger bands."""
+    x, squeeze = _as_2d(close)
+    mean = _rolling_sum(x, window) / window
+    mean_sq = _rolling_sum(x * x, window) / window
+    std = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0) * window / (window - 1))
+    return _restore(mean, squeeze), _restore(mean + num_std * std, squeeze), _restore(mean - num_std * std, squeeze)
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing."""
+    h, squeeze = _as_2d(high)
+    l, _ = _as_2d(low)
+    c, _ = _as_2d(close)
+    prev_close = np.vstack([np.full((1, c.shape[1]), np.nan), c[:-1]])
+    true_range = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+    out = ema(true_range, alpha=1.0 / period)
+    out[:period - 1] = np.nan
+    return _restore(out, squeeze)
+
+
+def drawdown(close) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the drawdown from the running peak at each date, and the maximum drawdown."""
+    x, squeeze = _as_2d(ffill(close))
+    peak = np.fmax.accumulate(x, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dd = x / peak - 1.0
+    return _restore(dd, squeeze), np.nanmin(dd, axis=0) if not squeeze else np.nanmin(dd)
+
+
+def _last_valid(x: np.ndarray) -> np.ndarray:
+    """Last non-NaN value of each column of a 2-D array."""
+    rows = np.where(~np.isnan(x), np.arange(len(x))[:, None], -1).max(axis=0)
+    return np.where(rows >= 0, x[np.maximum(rows, 0), np.arange(x.shape[1])], np.nan)
+
+
+def _trailing_return(x: np.ndarray, bars: int) -> np.ndarray:
+    if len(x) <= bars:
+        return np.full(x.shape[1], np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return x[-1] / x[-1 - bars] - 1.0
+
+
+def compute(high, low, close) -> dict:
+    """
+    Computes the latest value of every indicator for all tickers at once.
+
+    Args:
+        high, low, close: Arrays shaped (dates, tickers).
+
+    Returns:
+        dict: Indicator name -> array with one value per ticker.
+    """
+    h, _ = _as_2d(ffill(high))
+    l, _ = _as_2d(ffill(low))
+    c, _ = _as_2d(ffill(close))
+
+    macd_line, signal_line, histogram = macd(c)
+    mid, upper, lower = bollinger(c)
+    dd, max_dd = drawdown(c)
+    last = _last_valid(c)
+    atr14 = _last_valid(atr(h, l, c))
+    upper_last, lower_last, mid_last = _last_valid(upper), _last_valid(lower), _last_valid(mid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent_b = (last - lower_last) / (upper_last - lower_last)
+        band_width = (upper_last - lower_last) / mid_last
+        atr_pct = atr14 / last
+
+    return {
+        "close": last,
+        "sma20": _last_valid(sma(c, 20)),
+        "sma50": _last_valid(sma(c, 50)),
+        "sma200": _last_valid(sma(c, 200)),
+        "rsi14": _last_valid(rsi(c)),
+        "macd": _last_valid(macd_line),
+        "macd_signal": _last_valid(signal_line),
+        "macd_hist": _last_valid(histogram),
+        "bb_percent_b": percent_b,
+        "bb_width": band_width,
+        "atr14": atr14,
+        "atr_pct": atr_pct,
+        "drawdown": _last_valid(dd),
+        "max_drawdown": max_dd,
+        "return_1m": _trailing_return(c, 21),
+        "return_3m": _trailing_return(c, 63),
+        "return_1y": _trailing_return(c, 252),
+    }
+
+
+def digest(tickers: list, values: dict) -> str:
+    """
+    Formats the output of `compute` as one compact line per ticker for an LLM prompt.
+    """
+    def num(value, fmt="{:.2f}"):
+        return "n/a" if value is None or np.isnan(value) else fmt.format(value)
+
+    def pct(value):
+        return num(value, "{:+.1%}")
+
+    lines = []
+    for i, ticker in enumerate(tickers):
+        v = {name: array[i] for name, array in values.items()}
+        lines.append(
+            f"{ticker}: close {num(v['close'])}"
+            f" | SMA20/50/200 {num(v['sma20'])}/{num(v['sma50'])}/{num(v['sma200'])}"
+            f" | RSI14 {num(v['rsi14'], '{:.1f}')}"
+            f" | MACD {num(v['macd'])} sig {num(v['macd_signal'])} hist {num(v['macd_hist'], '{:+.2f}')}"
+            f" | BB %b {num(v['bb_percent_b'])} width {num(v['bb_width'], '{:.1%}')}"
+            f" | ATR14 {num(v['atr14'])} ({num(v['atr_pct'], '{:.1%}')})"
+            f" | ret 1m {pct(v['return_1m'])} 3m {pct(v['return_3m'])} 1y {pct(v['return_1y'])}"
+            f" | DD {pct(v['drawdown'])} maxDD {pct(v['max_drawdown'])}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,303 @@
+import atexit
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from tools.html_extract import extract_text
+from tools.web_search import format_results, web_search
+from utils.bm25 import tokenize
+from utils.paths import user_cache_dir
+
+
+class LocalSearchIndex:
+    """
+    Offline full-text search over scraped pages or local documents.
+
+    An inverted index (term -> {document id: term frequency}) is updated incrementally
+    as documents are added, replaced or removed, and queries are scored with BM25 by
+    touching only the postings of the query terms. Past `max_docs` documents, the least
+    recently added or updated ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        autosave: bool = False,
+        save_interval: float = 30.0,
+        max_docs: Optional[int] = 5000,
+    ):
+        """
+        Initializes the index, loading it from `path` if that file exists.
+
+        Args:
+            path (str, optional): Pickle file the index is saved to and loaded from.
+            k1 (float, optional): BM25 term-frequency saturation.
+            b (float, optional): BM25 length normalization.
+            autosave (bool, optional): Save to `path` after documents are added, at most once every
+                                       `save_interval` seconds, and once more at exit.
+            save_interval (float, optional): Minimum seconds between two automatic saves.
+            max_docs (int, optional): Maximum number of documents kept. None keeps them all.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.autosave = autosave and bool(path)
+        self.save_interval = save_interval
+        self.max_docs = max_docs
+        self.postings = {}
+        self.docs = {}       # doc id -> {"url", "title", "text", "length", "digest", "mtime"}
+        self.ids = {}        # url -> doc id
+        self.lengths = np.zeros(64)  # doc id -> length in terms (0 for removed ids)
+        self.total_length = 0
+        self._next_id = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            self.load(path)
+        if self.autosave:
+            atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, url: str, text: str, title: str = "", mtime: Optional[float] = None) -> bool:
+        """
+        Adds a document, replacing any previous version with the same URL.
+
+        Returns:
+            bool: False if the document was already indexed with the same content.
+        """
+        digest = hashlib.sha1(f"{title}\n{text}".encode("utf-8")).hexdigest()
+        terms = tokenize(f"{title} {text}")
+        with self._lock:
+            old_id = self.ids.get(url)
+            if old_id is not None:
+                if self.docs[old_id]["digest"] == digest:
+                    self.docs[old_id]["mtime"] = mtime
+                    return False
+                self._remove(old_id)
+
+            doc_id = self._next_id
+            self._next_id += 1
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+            self.docs[doc_id] = {
+                "url": url, "title": title, "text": text, "length": len(terms), "digest": digest, "mtime": mtime,
+            }
+            self.ids[url] = doc_id
+            if doc_id >= len(self.lengths):
+                self.lengths = np.concatenate([self.lengths, np.zeros(len(self.lengths))])
+            self.lengths[doc_id] = len(terms)
+            self.total_length += len(terms)
+            self._dirty = True
+            if self.max_docs is not None:
+                while len(self.docs) > self.max_docs:
+                    self._remove(next(iter(self.docs)))  # docs keep insertion order: oldest first
+                if self._next_id > 4 * max(self.max_docs, 64):
+                    self._renumber()
+            if self.autosave and time.monotonic() - self._saved_at >= self.save_interval:
+                self.save()
+            return True
+
+    def flush(self) -> None:
+        """Saves the index to its path if it changed since the last save."""
+        if self.path and self._dirty:
+            self.save()
+
+    def remove(self, url: str) -> None:
+        with self._lock:
+            doc_id = self.ids.get(url)
+            if doc_id is not None:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        doc = self.docs.pop(doc_id)
+        del self.ids[doc["url"]]
+        self.lengths[doc_id] = 0
+        self.total_length -= doc["length"]
+        self._dirty = True
+        for term in set(tokenize(f"{doc['title']} {doc['text']}")):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def _renumber(self) -> None:
+        """Gives the live documents ids 0..n-1 again, so evictions do not grow `lengths` forever."""
+        mapping = {old_id: new_id for new_id, old_id in enumerate(self.docs)}
+        self.docs = {mapping[old_id]: doc for old_id, doc in self.docs.items()}
+        self.ids = {url: mapping[old_id] for url, old_id in self.ids.items()}
+        self.postings = {
+            term: {mapping[old_id]: count for old_id, count in posting.items()}
+            for term, posting in self.postings.items()
+        }
+        self._next_id = len(self.docs)
+        self.lengths = np.zeros(max(self._next_id * 2, 64))
+        for doc_id, doc in self.docs.items():
+            self.lengths[doc_id] = doc["length"]
+
+    def add_page(self, page: dict) -> bool:
+        """Adds a page as returned by `HTMLContentScraper.extract_page`."""
+        return self.add(page["url"], page["text"], title=page.get("title", ""))
+
+    def add_directory(self, directory: str, extensions: tuple = (".txt", ".md", ".html", ".htm")) -> int:
+        """
+        Indexes every matching file under a directory; unchanged files (same mtime) are skipped.
+
+        Returns:
+            int: The number of documents added or updated.
+        """
+        changed = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.lower().endswith(extensions):
+                    continue
+                path = os.path.abspath(os.path.join(root, name))
+                url = f"file://{path}"
+                mtime = os.path.getmtime(path)
+                with self._lock:
+                    doc_id = self.ids.get(url)
+                    if doc_id is not None and self.docs[doc_id]["mtime"] == mtime:
+                        continue
+                try:
+                    with open(path, "rb") as f:
+                        raw = f.read()
+                except OSError as e:
+                    print(f"Error reading {path}: {e}")
+                    continue
+                if name.lower().endswith((".html", ".htm")):
+                    extractor = extract_text([raw], base_url=url)
+                    title, text = extractor.title or name, extractor.text
+                else:
+                    title, text = name, raw.decode("utf-8", errors="replace")
+                changed += self.add(url, text, title=title, mtime=mtime)
+        return changed
+
+    def search(self, query: str, num_results: int = 3) -> list:
+        """
+        Scores the indexed documents against a query with BM25.
+
+        Returns:
+            list: Dictionaries with 'title', 'description' (a snippet), 'url', 'score' and 'rank',
+                  best first, in the same shape as `tools.web_search.search_results`.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not self.docs or not terms:
+                return []
+            n_docs = len(self.docs)
+            avg_length = self.total_length / n_docs or 1.0
+            lengths = self.lengths
+
+            scores = np.zeros(self._next_id)
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                ids = np.fromiter(posting.keys(), dtype=np.int64, count=len(posting))
+                tf = np.fromiter(posting.values(), dtype=float, count=len(posting))
+                idf = np.log(1.0 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[ids] / avg_length)
+                scores[ids] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+            top = np.argsort(-scores)[:num_results]
+            results = []
+            for rank, doc_id in enumerate((i for i in top if scores[i] > 0), start=1):
+                doc = self.docs[int(doc_id)]
+                results.append({
+                    "title": doc["title"],
+                    "description": _snippet(doc["text"], terms),
+                    "url": doc["url"],
+                    "score": float(scores[doc_id]),
+                    "rank": rank,
+                })
+            return results
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        with self._lock:
+            state = {
+                "postings": self.postings, "docs": self.docs, "ids": self.ids,
+                "total_length": self.total_length, "next_id": self._next_id,
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.tmp", path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+    def load(self, path: str) -> None:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        with self._lock:
+            self.postings = state["postings"]
+            self.docs = state["docs"]
+            self.ids = state["ids"]
+            self.total_length = state["total_length"]
+            self._next_id = state["next_id"]
+            self.lengths = np.zeros(max(self._next_id, 64))
+            for doc_id, doc in self.docs.items():
+                self.lengths[doc_id] = doc["length"]
+
+
+def _snippet(text: str, terms: list, width: int = 240) -> str:
+    """Returns the part of a text around the first query term, collapsed to one line."""
+    match = re.search(r"\b(" + "|".join(re.escape(term) for term in terms) + r")", text, re.IGNORECASE)
+    start = max((match.start() if match else 0) - width // 4, 0)
+    snippet = " ".join(text[start:start + width].split())
+    return ("..." if start else "") + snippet + ("..." if start + width < len(text) else "")
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+DEFAULT_INDEX_PATH = user_cache_dir("search_index.pkl")
+
+
+def default_index() -> LocalSearchIndex:
+    """
+    Returns the process-wide index used by `local_search`, stored in the user cache
+    directory (see `utils.paths.user_cache_dir`) and saved automatically. Scrapers add
+    pages to it only when given it, e.g. `HTMLContentScraper(index=default_index())`.
+    """
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = LocalSearchIndex(DEFAULT_INDEX_PATH, autosave=True)
+        return _default_index
+
+
+def local_search(query: str):
+    """
+    Drop-in offline replacement for `web_search`: same signature, same output format,
+    answered from the local index.
+    """
+    results = default_index().search(query, num_results=3)
+    if not results:
+        return f"An error occurred during the search: no local results for {query}"
+    return format_results(query, results)
+
+
+def local_first_search(query: str, min_score: float = 1.0):
+    """
+    Answers from the local index when it has a good enough match, and falls back to `web_search` otherwise.
+    """
+    results = default_index().search(query, num_results=3)
+    if results and results[0]["score"] >= min_score:
+        return format_results(query, results)
+    return web_search(query)
@@ -1,13 +1,34 @@
-from typing import Callable, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Union
+from tools.cache import CachePolicy, MISSING, exact_args
+from utils.singleflight import SingleFlight
+
+# Shared by every OwnTool, so identical calls coalesce across tool instances.
+tool_flight = SingleFlight()
 
 class OwnTool:
-    def __init__(self, func: Callable, description: str, **params):
+    def __init__(
+        self,
+        func: Callable,
+        description: str,
+        cache: Union[CachePolicy, bool, None] = None,
+        coalesce: bool = False,
+        **params,
+    ):
         """
         Initialize the OwnTool with the given parameters.
 
         Args:
             func (Callable): The tool function to use.
             description (str): The description of the tool.
+            cache (CachePolicy | bool, optional): Cache policy for the tool results.
+                                                  None uses the default policy shipped with `func`
+                                                  (see `tools.cache.cache_policy`), False disables caching.
+            coalesce (bool, optional): While a call is in flight, identical calls (same arguments,
+                                       or same cache key when cached) wait for its result instead of
+                                       calling the tool again. Only for idempotent tools. Defaults to False.
             params (Optional[str]): The parameters for the tool.
         """
         self.func = func
@@ -15,5 +36,95 @@ class OwnTool:
         if params is not None:
             self.params = params
 
+        self.coalesce = coalesce
+
+        name = getattr(func, "__qualname__", type(func).__name__)
+        if "<" in name:  # lambdas and closures need a distinct namespace each
+            name = f"{name}#{id(func):x}"
+        self.name = f"{getattr(func, '__module__', None)}.{name}"
+
+        if cache is None or cache is True:
+            cache = getattr(func, "cache_policy", None)
+        self.cache: Optional[CachePolicy] = cache or None
+        if self.cache is not None and self.cache.name is None:
+            self.cache.name = self.name
+
+        # key -> [args, kwargs, request count, last request time], used by `tools.refresher`
+        self._requests = OrderedDict()
+        self._requests_lock = threading.Lock()
+
     def __call__(self, *args, **kwargs):
-        return self.func(*args, **kwargs)
+        if self.cache is None:
+            if not self.coalesce:
+                return self.func(*args, **kwargs)
+            return tool_flight.do((self.name, exact_args(*args, **kwargs)), self.func, *args, **kwargs)
+
+        key = self.cache.key(*args, **kwargs)
+        self._track(key, args, kwargs)
+        value = self.cache.get(key)
+        if value is MISSING:
+            if self.coalesce:
+                value = tool_flight.do((self.cache.name, key), self._fetch, key, args, kwargs)
+            else:
+                value = self._fetch(key, args, kwargs)
+        return value
+
+    def _fetch(self, key, args, kwargs):
+        value = self.func(*args, **kwargs)
+        self.cache.set(key, value)
+        return value
+
+    def _track(self, key, args, kwargs):
+        with self._requests_lock:
+            entry = self._requests.pop(key, None)
+            if entry is None:
+                entry = [args, kwargs, 0, 0.0]
+            entry[2] += 1
+            entry[3] = time.time()
+            self._requests[key] = entry
+            while len(self._requests) > self.cache.max_entries:
+                self._requests.popitem(last=False)
+
+    def hot_keys(self, n: int = 10, max_idle: Optional[float] = None) -> list[tuple[Any, int]]:
+        """
+        Returns the most requested cache keys of the tool.
+
+        Args:
+            n (int): Maximum number of keys to return.
+            max_idle (float, optional): Skip keys not requested within this many seconds.
+
+        Returns:
+            list: (key, request count) pairs, most requested first.
+        """
+        now = time.time()
+        with self._requests_lock:
+            candidates = [
+                (key, entry[2]) for key, entry in self._requests.items()
+                if max_idle is None or now - entry[3] <= max_idle
+            ]
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        return candidates[:n]
+
+    def refresh(self, key: Any) -> bool:
+        """
+        Re-fetches a previously requested key and stores the fresh result.
+
+        Returns:
+            bool: True if the result was fetched and cached.
+        """
+        if self.cache is None:
+            return False
+        with self._requests_lock:
+            entry = self._requests.get(key)
+        if entry is None:
+            return False
+        value = self._fetch(key, entry[0], entry[1])
+        return self.cache.cache_if(value)
+
+    def metrics(self) -> dict:
+        """
+        Returns the cache metrics of the tool (hits, misses and hit rate).
+        """
+        if self.cache is None:
+            return {}
+        return self.cache.metrics()
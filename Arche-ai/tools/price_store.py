@@ -0,0 +1,258 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+# Stored columns: raw bars plus the adjusted close, so adjusted prices can be derived on read
+STORED_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+_PERIOD_DAYS = {
+    "d": 1,
+    "wk": 7,
+    "mo": 31,
+    "y": 366,
+}
+
+
+def period_start(period: str, today: Optional[datetime.date] = None) -> Optional[np.datetime64]:
+    """
+    Converts a yfinance period ("5d", "1mo", "1y", "ytd", "max", ...) into a start date.
+
+    Returns:
+        numpy.datetime64: The first day covered by the period, or None for "max".
+    """
+    today = today or datetime.date.today()
+    period = period.strip().lower()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return np.datetime64(datetime.date(today.year, 1, 1), "D")
+    for unit, days in _PERIOD_DAYS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return np.datetime64(today, "D") - int(period[:-len(unit)]) * days
+    raise ValueError(f"Unsupported period '{period}'.")
+
+
+class PriceStore:
+    """
+    Local on-disk store of daily price history, one set of NumPy files per ticker.
+
+    For each ticker the store keeps `<TICKER>.<version>.npy` (float64 rows following
+    `STORED_COLUMNS`), `<TICKER>.<version>.dates.npy` (the datetime64[D] index) and a
+    small `<TICKER>.json` with sync metadata naming the current version. Every sync
+    writes a new version instead of replacing the files in place, so arrays already
+    memory-mapped by readers stay valid; older versions are removed once nothing
+    holds them open.
+
+    Syncing only downloads the bars after the last stored date. A new dividend or
+    split changes the adjusted prices of the whole history, so it triggers a full
+    re-download of the covered range.
+    """
+
+    def __init__(self, directory: str = os.path.join("data", "prices"), max_age: float = 3600):
+        """
+        Initializes the store.
+
+        Args:
+            directory (str, optional): Directory holding the files. Created if missing.
+            max_age (float, optional): Seconds after which a ticker is synced again on query.
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, ticker: str, version: Optional[int] = None) -> tuple[str, str, str]:
+        base = os.path.join(self.directory, ticker.strip().upper())
+        return f"{base}.{version}.npy", f"{base}.{version}.dates.npy", f"{base}.json"
+
+    def _load_meta(self, ticker: str) -> dict:
+        try:
+            with open(self._paths(ticker)[2], "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the stored (dates, values) arrays of a ticker, memory-mapped read-only.
+        `values` columns follow `STORED_COLUMNS`. Both are empty if nothing is stored yet.
+        """
+        return self._load(ticker, self._load_meta(ticker))
+
+    def _load(self, ticker: str, meta: dict) -> tuple[np.ndarray, np.ndarray]:
+        values_path, dates_path, _ = self._paths(ticker, meta.get("version"))
+        if "version" not in meta or not os.path.exists(values_path) or not os.path.exists(dates_path):
+            return np.empty(0, dtype="datetime64[D]"), np.empty((0, len(STORED_COLUMNS)))
+        return np.load(dates_path, mmap_mode="r"), np.load(values_path, mmap_mode="r")
+
+    def _write(self, ticker: str, dates: np.ndarray, values: np.ndarray, meta: dict) -> None:
+        version = self._load_meta(ticker).get("version", 0) + 1
+        values_path, dates_path, meta_path = self._paths(ticker, version)
+        for path, array in ((values_path, values), (dates_path, dates)):
+            with open(path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+        # The metadata switch is the commit point: readers see either version, never a mix
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump({**meta, "version": version}, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        self._remove_old_versions(ticker, version)
+
+    def _remove_old_versions(self, ticker: str, current: int) -> None:
+        pattern = re.compile(rf"{re.escape(ticker.strip().upper())}(\.\d+)?(\.dates)?\.npy")
+        for name in os.listdir(self.directory):
+            match = pattern.fullmatch(name)
+            if match and match.group(1) != f".{current}":
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    # Still memory-mapped somewhere (Windows); retried after the next sync
+                    pass
+
+    @staticmethod
+    def _to_arrays(history: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        index = history.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        dates = index.normalize().values.astype("datetime64[D]")
+        values = history.reindex(columns=list(STORED_COLUMNS)).to_numpy(dtype=float)
+        return dates, values
+
+    @staticmethod
+    def _actions(history: pd.DataFrame) -> np.ndarray:
+        """Marks the bars carrying a dividend or a split."""
+        actions = history.reindex(columns=["Dividends", "Stock Splits"]).fillna(0).to_numpy(dtype=float)
+        return (actions != 0).any(axis=1)
+
+    def _download(self, ticker: str, start: Optional[np.datetime64], end: Optional[np.datetime64] = None):
+        """Returns (dates, values, actions) of the bars from `start` to `end` (exclusive)."""
+        stock = yf.Ticker(ticker)
+        if start is None:
+            history = stock.history(period="max", auto_adjust=False)
+        else:
+            history = stock.history(start=str(start), end=str(end) if end is not None else None, auto_adjust=False)
+        if history is None or history.empty:
+            return np.empty(0, dtype="datetime64[D]"), np.empty((0, len(STORED_COLUMNS))), np.empty(0, dtype=bool)
+        return (*self._to_arrays(history), self._actions(history))
+
+    def sync(self, ticker: str, start: Optional[np.datetime64] = None) -> int:
+        """
+        Brings the stored history of a ticker up to date.
+
+        Only bars from the last stored date onwards are downloaded (the last bar is
+        re-fetched because it may have been stored mid-session). If `start` is earlier
+        than the stored history, the missing older range is back-filled once. If the
+        new bars bring a dividend or a split, the whole covered range is downloaded again.
+
+        Args:
+            ticker (str): The stock symbol.
+            start (numpy.datetime64, optional): First date the store must cover. None means "max".
+
+        Returns:
+            int: The number of bars downloaded.
+        """
+        ticker = ticker.strip().upper()
+        with self._lock:
+            meta = self._load_meta(ticker)
+            dates, values = self._load(ticker, meta)
+            dates, values = np.array(dates), np.array(values)
+            downloaded = 0
+
+            covered_from = meta.get("covered_from", "max" if meta else None)
+            needs_backfill = len(dates) == 0 or (
+                covered_from != "max" and (start is None or start < np.datetime64(covered_from, "D"))
+            )
+            if needs_backfill and len(dates):
+                old_dates, old_values, _ = self._download(ticker, start, end=dates[0])
+                keep = old_dates < dates[0]
+                dates = np.concatenate([old_dates[keep], dates])
+                values = np.concatenate([old_values[keep], values])
+                downloaded += int(keep.sum())
+            elif needs_backfill:
+                dates, values, _ = self._download(ticker, start)
+                downloaded += len(dates)
+
+            if needs_backfill:
+                covered_from = "max" if start is None else str(start)
+
+            if len(dates) and not (needs_backfill and downloaded == len(dates)):
+                new_dates, new_values, actions = self._download(ticker, dates[-1])
+                if len(new_dates):
+                    adjustment_changed = bool(actions[new_dates > dates[-1]].any()) or (
+                        new_dates[0] == dates[-1] and not np.isclose(
+                            new_values[0, 4] / new_values[0, 3], values[-1, 4] / values[-1, 3], equal_nan=True
+                        )
+                    )
+                    if adjustment_changed:
+                        first = None if covered_from == "max" else np.datetime64(covered_from, "D")
+                        dates, values, _ = self._download(ticker, first)
+                        downloaded += len(dates)
+                    else:
+                        keep = dates < new_dates[0]
+                        dates = np.concatenate([dates[keep], new_dates])
+                        values = np.concatenate([values[keep], new_values])
+                        downloaded += len(new_dates)
+
+            self._write(ticker, dates, values, {"covered_from": covered_from, "synced_at": time.time()})
+            return downloaded
+
+    def query(
+        self,
+        ticker: str,
+        start: Optional[np.datetime64] = None,
+        end: Optional[np.datetime64] = None,
+        sync: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the stored bars of a ticker between two dates (inclusive).
+
+        Args:
+            ticker (str): The stock symbol.
+            start (numpy.datetime64, optional): First date. None means the start of the stored history.
+            end (numpy.datetime64, optional): Last date. None means the latest stored bar.
+            sync (bool, optional): Sync first if the ticker is stale or does not cover `start`.
+
+        Returns:
+            tuple: (dates, values) memory-mapped slices; `values` columns follow `STORED_COLUMNS`
+                   (raw prices plus the adjusted close).
+        """
+        if sync:
+            meta = self._load_meta(ticker)
+            covered_from = meta.get("covered_from")
+            stale = time.time() - meta.get("synced_at", 0) > self.max_age
+            uncovered = covered_from is None or "version" not in meta or (
+                covered_from != "max" and (start is None or np.datetime64(start, "D") < np.datetime64(covered_from, "D"))
+            )
+            if stale or uncovered:
+                self.sync(ticker, start=None if start is None else np.datetime64(start, "D"))
+
+        dates, values = self.load(ticker)
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return dates[lo:hi], values[lo:hi]
+
+    def get_frame(self, ticker: str, period: str = "1y", adjusted: bool = True) -> pd.DataFrame:
+        """
+        Returns the bars of a ticker for a yfinance period as a DataFrame (Open, High, Low, Close, Volume).
+
+        Args:
+            ticker (str): The stock symbol.
+            period (str, optional): The yfinance period. Defaults to "1y".
+            adjusted (bool, optional): Adjust prices for dividends and splits, like
+                                       `yf.Ticker.history` does by default. Defaults to True.
+        """
+        dates, values = self.query(ticker, start=period_start(period))
+        index = pd.DatetimeIndex(dates, name="Date")
+        if not adjusted:
+            return pd.DataFrame(values[:, [0, 1, 2, 3, 5]], index=index, columns=list(COLUMNS))
+        ratio = values[:, 4] / values[:, 3]
+        adjusted_values = np.column_stack([values[:, :3] * ratio[:, None], values[:, 4], values[:, 5]])
+        return pd.DataFrame(adjusted_values, index=index, columns=list(COLUMNS), copy=False)
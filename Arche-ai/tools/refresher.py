@@ -0,0 +1,173 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from tools.own_tool import OwnTool
+
+
+class CacheRefresher:
+    """
+    Keeps the hottest cached tool results warm by re-fetching them shortly
+    before their TTL runs out.
+    """
+
+    def __init__(
+        self,
+        tools: List[OwnTool],
+        interval: float = 1.0,
+        lead: float = 0.1,
+        top_k: int = 20,
+        budget: int = 60,
+        budget_window: float = 60.0,
+        max_idle: float = 600.0,
+        max_workers: int = 4,
+        verbose: bool = False,
+    ):
+        """
+        Initializes the refresher.
+
+        Args:
+            tools (List[OwnTool]): Cached tools to keep warm. Tools without a cache policy are ignored.
+            interval (float, optional): Seconds between two scans of the hot keys.
+            lead (float, optional): Fraction of the TTL before expiry at which a key is re-fetched.
+                                    Never less than `interval`, so a key cannot expire between scans.
+            top_k (int, optional): Number of most requested keys tracked per tool.
+            budget (int, optional): Maximum number of upstream requests per `budget_window`.
+            budget_window (float, optional): Length of the budget window in seconds.
+            max_idle (float, optional): Keys not requested for this many seconds are no longer kept warm.
+            max_workers (int, optional): Maximum number of concurrent re-fetches.
+            verbose (bool, optional): Whether to print refresh activity.
+        """
+        self.tools = [tool for tool in tools if tool.cache is not None]
+        self.interval = interval
+        self.lead = lead
+        self.top_k = top_k
+        self.budget = budget
+        self.budget_window = budget_window
+        self.max_idle = max_idle
+        self.max_workers = max_workers
+        self.verbose = verbose
+
+        self.refreshed = 0
+        self.failed = 0
+        self._spent = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _remaining_budget(self) -> int:
+        now = time.time()
+        while self._spent and now - self._spent[0] > self.budget_window:
+            self._spent.popleft()
+        return self.budget - len(self._spent)
+
+    def _due(self) -> list:
+        """Returns (expires_in, tool, key) for every hot key about to expire, soonest first."""
+        due = []
+        for tool in self.tools:
+            lead_time = max(tool.cache.ttl * self.lead, self.interval)
+            for key, _ in tool.hot_keys(self.top_k, max_idle=self.max_idle):
+                expires_in = tool.cache.expires_in(key)
+                if expires_in is not None and expires_in <= lead_time:
+                    due.append((expires_in, tool, key))
+        due.sort(key=lambda item: item[0])
+        return due
+
+    def _refresh(self, tool: OwnTool, key) -> bool:
+        try:
+            return tool.refresh(key)
+        except Exception as e:
+            if self.verbose:
+                print(f"Error refreshing {tool.cache.name} {key}: {e}")
+            return False
+
+    def tick(self) -> int:
+        """
+        Runs one scan and re-fetches the keys that are due, within the request budget.
+
+        Returns:
+            int: The number of keys refreshed.
+        """
+        due = self._due()[:max(self._remaining_budget(), 0)]
+        if not due:
+            return 0
+
+        self._spent.extend([time.time()] * len(due))
+        refreshed = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._refresh, tool, key) for _, tool, key in due]
+            for future in concurrent.futures.as_completed(futures):
+                if future.result():
+                    refreshed += 1
+        self.refreshed += refreshed
+        self.failed += len(due) - refreshed
+        if self.verbose:
+            print(f"Refreshed {refreshed}/{len(due)} hot keys.")
+        return refreshed
+
+    def warm_keys(self) -> dict:
+        """
+        Returns the keys currently kept warm, per tool.
+
+        Returns:
+            dict: Maps each tool's cache name to a list of dictionaries with
+                  'key', 'requests' and 'expires_in' (seconds, None if not cached).
+        """
+        return {
+            tool.cache.name: [
+                {"key": key, "requests": requests, "expires_in": tool.cache.expires_in(key)}
+                for key, requests in tool.hot_keys(self.top_k, max_idle=self.max_idle)
+            ]
+            for tool in self.tools
+        }
+
+    def start(self) -> "CacheRefresher":
+        """
+        Starts refreshing on a background daemon thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="CacheRefresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the background thread (or the `run_async` loop).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Error in cache refresher: {e}")
+
+    async def run_async(self) -> None:
+        """
+        Refreshes on the running event loop until `stop()` is called.
+        Blocking re-fetches are run in worker threads.
+
+        Example:
+            task = asyncio.create_task(refresher.run_async())
+        """
+        self._stop.clear()
+        while not self._stop.is_set():
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                print(f"Error in cache refresher: {e}")
+
+    def __enter__(self) -> "CacheRefresher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
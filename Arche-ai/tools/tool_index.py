@@ -0,0 +1,97 @@
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from tools.own_tool import OwnTool
+from utils.embedding import HashingEmbedder
+
+
+def tool_text(tool: OwnTool) -> str:
+    """Text a tool is indexed by: its function name, description and parameters."""
+    params = getattr(tool, "params", None) or {}
+    parts = [tool.func.__name__, tool.description]
+    for name, info in params.items():
+        if info is None:
+            continue
+        parts.append(name)
+        if isinstance(info, dict):
+            parts.append(str(info.get("description", "")))
+            parts.extend(str(option) for option in info.get("options", []))
+        else:
+            parts.append(str(info))
+    return " ".join(parts)
+
+
+class ToolIndex:
+    """
+    Embedding index over a tool set, used to put only the tools relevant to a task
+    into an agent's planning prompt.
+
+    Tools are embedded once with a `HashingEmbedder`; a query costs one embedding and
+    one matrix-vector product, so selecting from hundreds of tools takes well under a
+    millisecond.
+    """
+
+    def __init__(self, tools: List[OwnTool], embedder: Optional[HashingEmbedder] = None):
+        """
+        Initializes the index.
+
+        Args:
+            tools (List[OwnTool]): The tools to index.
+            embedder (HashingEmbedder, optional): Embedder to use. Defaults to a 1024-dimension one.
+        """
+        self.tools = list(tools)
+        self.embedder = embedder or HashingEmbedder()
+        # A tool named in the task (as a whole identifier, not inside another word) is always selected
+        self.name_patterns = [
+            re.compile(rf"(?<![\w]){re.escape(tool.func.__name__)}(?![\w])", re.IGNORECASE) for tool in self.tools
+        ]
+        self.vectors = self.embedder.embed(tool_text(tool) for tool in self.tools)
+
+    def __len__(self) -> int:
+        return len(self.tools)
+
+    def scores(self, task: str) -> np.ndarray:
+        """Cosine similarity of every tool to a task; a tool named in the task scores at least 1."""
+        if not self.tools:
+            return np.zeros(0)
+        scores = self.vectors @ self.embedder.embed_one(task)
+        named = np.array([pattern.search(task) is not None for pattern in self.name_patterns])
+        return np.where(named, np.maximum(scores, 1.0), scores)
+
+    def top_k(self, task: str, k: int = 5, min_score: float = 0.0) -> List[OwnTool]:
+        """
+        Returns the `k` tools most similar to a task.
+
+        The tools keep their original order (not the score order), so the same selection
+        always yields the same prompt.
+
+        Args:
+            task (str): The task or query.
+            k (int, optional): Maximum number of tools.
+            min_score (float, optional): Tools scoring below this are left out. Unrelated tools
+                                         score up to about 0.1 from shared character n-grams.
+
+        An obvious task selects its tool, and nothing unrelated is added to fill `k`:
+
+        >>> def get_weather(location): ...
+        >>> def get_stock_price(ticker): ...
+        >>> def send_email(to, subject, body): ...
+        >>> index = ToolIndex([
+        ...     OwnTool(get_weather, "Current weather for a city.", location="City name"),
+        ...     OwnTool(get_stock_price, "Latest stock price of a ticker.", ticker="Stock symbol, e.g. AAPL"),
+        ...     OwnTool(send_email, "Send an email to a recipient.", to="Recipient address", body="Message body"),
+        ... ])
+        >>> [tool.func.__name__ for tool in index.top_k("email bob the report", k=2, min_score=0.15)]
+        ['send_email']
+        >>> [tool.func.__name__ for tool in index.top_k("what's the weather in Paris?", k=2, min_score=0.15)]
+        ['get_weather']
+        >>> [tool.func.__name__ for tool in index.top_k("price of AAPL stock", k=2, min_score=0.15)]
+        ['get_stock_price']
+        """
+        if len(self.tools) <= k and min_score <= 0:
+            return list(self.tools)
+        scores = self.scores(task)
+        best = np.argsort(-scores, kind="stable")[:k]
+        return [self.tools[i] for i in sorted(best) if scores[i] >= min_score]
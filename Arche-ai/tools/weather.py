@@ -1,5 +1,7 @@
 import requests
+from tools.cache import cache_policy, casefold_args
 
+@cache_policy(ttl=600, max_entries=128, key=casefold_args)
 def get_weather(location):
   """Fetches and prints weather data including the next day's forecast for the given location.
 
@@ -1,13 +1,119 @@
+import concurrent.futures
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from googlesearch import search
+from tools.cache import cache_policy, casefold_args
+from utils.bm25 import tokenize
 
+def search_results(query: str, num_results: int = 3) -> list:
+    """
+    Runs one Google search and returns structured results.
+
+    Returns:
+        list: Dictionaries with 'title', 'description', 'url' and 'rank' (1-based).
+    """
+    return [
+        {"title": result.title, "description": result.description, "url": result.url, "rank": rank}
+        for rank, result in enumerate(search(query, advanced=True, num_results=num_results), start=1)
+    ]
+
+def format_results(query: str, results: list) -> str:
+    """Formats structured results the way `web_search` always has."""
+    lines = [f"The search results for {query} are as follows: \n"]
+    for i, result in enumerate(results):
+        lines.append(f"{i+1}. \nTitle: {result['title']}\nDescription: {result['description']}\nSource: {result['url']}\n")
+    lines.append("[END]Search Results[END]")
+    return "\n".join(lines)
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for de-duplication: no scheme, www., fragment, tracking params or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    host = host[4:] if host.startswith("www.") else host
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.lower().startswith("utm_")]
+    return urlunsplit(("", host, parts.path.rstrip("/"), urlencode(sorted(params)), ""))
+
+def reformulate(query: str) -> list:
+    """
+    Builds simple reformulations of a query: the query itself, its keywords only,
+    and its keywords as an exact phrase when there are several.
+    """
+    keywords = " ".join(tokenize(query))
+    variants = [query.strip()]
+    if keywords:
+        variants.append(keywords)
+        if len(keywords.split()) > 1:
+            variants.append(f'"{keywords}"')
+    return list(dict.fromkeys(v for v in variants if v))
+
+def multi_search(
+    query: str,
+    reformulations: list = None,
+    num_results: int = 3,
+    per_query: int = None,
+    k: int = 60,
+    max_workers: int = 8,
+) -> dict:
+    """
+    Runs several reformulations of a query concurrently and merges them with reciprocal rank fusion.
+
+    Each URL (after normalization) appears once; its score is the sum of 1 / (k + rank)
+    over every query that returned it, so pages found by several phrasings rise to the top.
+
+    Args:
+        query (str): The original query.
+        reformulations (list, optional): Queries to run. Defaults to `reformulate(query)`.
+        num_results (int, optional): Number of fused results to return. Defaults to 3.
+        per_query (int, optional): Results fetched per query. Defaults to `num_results + 2`.
+        k (int, optional): RRF damping constant. Defaults to 60.
+        max_workers (int, optional): Maximum number of searches run at once. Defaults to 8.
+
+    Returns:
+        dict: 'query', 'queries', 'results' (dictionaries with 'title', 'description', 'url',
+              'score' and the 'queries' that found it) and 'text' (formatted like `web_search`).
+              'results' is empty if there is nothing to search for.
+    """
+    queries = list(dict.fromkeys(q.strip() for q in reformulations or reformulate(query or "") if q and q.strip()))
+    if not queries:
+        return {"query": query, "queries": [], "results": [], "text": format_results(query, [])}
+    per_query = per_query or num_results + 2
+
+    fused = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(queries), max_workers)) as executor:
+        futures = {executor.submit(search_results, q, per_query): q for q in queries}
+        for future in concurrent.futures.as_completed(futures):
+            q = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Error searching for '{q}': {e}")
+                continue
+            for result in results:
+                key = normalize_url(result["url"])
+                entry = fused.setdefault(key, {
+                    "title": result["title"], "description": result["description"], "url": result["url"],
+                    "score": 0.0, "queries": [],
+                })
+                entry["score"] += 1.0 / (k + result["rank"])
+                entry["queries"].append(q)
+
+    ranked = sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:num_results]
+    return {"query": query, "queries": queries, "results": ranked, "text": format_results(query, ranked)}
+
+@cache_policy(ttl=900, cache_if=lambda result: not result.startswith("An error occurred"), key=casefold_args)
 def web_search(query: str):
     try:
-        results = list(search(query, advanced=True, num_results=3))
-        output = f"The search results for {query} are as follows: \n\n"
-        for i, result in enumerate(results):
-            output += f"{i+1}. \nTitle: {result.title}\nDescription: {result.description}\nSource: {result.url}\n\n"
-        output += "[END]Search Results[END]"
-        return output
+        return format_results(query, search_results(query, num_results=3))
+    except Exception as e:
+        return f"An error occurred during the search: {e}"
+
+@cache_policy(ttl=900, cache_if=lambda result: not result.startswith("An error occurred"), key=casefold_args)
+def multi_web_search(query: str):
+    """Like `web_search`, but runs several reformulations concurrently and fuses their rankings."""
+    try:
+        result = multi_search(query)
+        if not result["results"]:
+            return f"An error occurred during the search: no results for {query}"
+        return result["text"]
     except Exception as e:
         return f"An error occurred during the search: {e}"
     
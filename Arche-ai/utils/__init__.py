@@ -0,0 +1,6 @@
+from utils.singleflight import SingleFlight
+from utils.tokens import count_tokens
+from utils.chunking import chunk_text, select_passages
+from utils.embedding import HashingEmbedder
+
+from utils.paths import user_cache_dir
\ No newline at end of file
@@ -0,0 +1,48 @@
+import re
+from collections import Counter
+from typing import Iterable, List
+
+import numpy as np
+
+_TOKENS = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or that the this "
+    "to was were what when where which who why will with you your about into than then there".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases a text and splits it into alphanumeric terms, dropping stopwords."""
+    return [term for term in _TOKENS.findall(text.lower()) if term not in STOPWORDS]
+
+
+def bm25_scores(query: str, documents: Iterable[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """
+    Scores documents against a query with Okapi BM25.
+
+    Only the query terms are counted, so the cost is one pass over the documents
+    plus a (documents x query terms) NumPy computation.
+
+    Returns:
+        numpy.ndarray: One score per document, in input order.
+    """
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    documents = [tokenize(document) for document in documents]
+    if not documents:
+        return np.zeros(0)
+    lengths = np.array([len(terms) for terms in documents], dtype=float)
+    if not query_terms:
+        return np.zeros(len(documents))
+
+    index = {term: i for i, term in enumerate(query_terms)}
+    tf = np.zeros((len(documents), len(query_terms)))
+    for row, terms in enumerate(documents):
+        for term, count in Counter(term for term in terms if term in index).items():
+            tf[row, index[term]] = count
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log(1.0 + (len(documents) - df + 0.5) / (df + 0.5))
+    avg_length = lengths.mean() or 1.0
+    norm = k1 * (1.0 - b + b * lengths / avg_length)
+    return ((tf * (k1 + 1.0)) / (tf + norm[:, None]) * idf).sum(axis=1)
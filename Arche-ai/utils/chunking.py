@@ -0,0 +1,95 @@
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from utils.bm25 import bm25_scores
+from utils.tokens import count_tokens
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+
+def _spans(text: str, pattern: re.Pattern, start: int = 0, end: Optional[int] = None):
+    """Yields (start, end) offsets of the pieces of text[start:end] separated by `pattern`."""
+    end = len(text) if end is None else end
+    position = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > position:
+            yield position, match.start()
+        position = match.end()
+    if position < end:
+        yield position, end
+
+
+def chunk_text(text: str, max_tokens: int = 200) -> List[dict]:
+    """
+    Splits a text into passages of at most about `max_tokens` tokens.
+
+    Paragraphs are kept whole when they fit and merged with their neighbours up to the
+    limit; longer paragraphs are split on sentences, and longer sentences on characters.
+
+    Returns:
+        list: Dictionaries with 'start' and 'end' character offsets into `text`, and 'text'.
+    """
+    pieces = []
+    for start, end in _spans(text, _PARAGRAPHS):
+        if count_tokens(text[start:end]) <= max_tokens:
+            pieces.append((start, end))
+            continue
+        for s_start, s_end in _spans(text, _SENTENCES, start, end):
+            step = max_tokens * 4
+            for c_start in range(s_start, s_end, step):
+                pieces.append((c_start, min(c_start + step, s_end)))
+
+    chunks = []
+    for start, end in pieces:
+        if chunks and count_tokens(text[chunks[-1]["start"]:end]) <= max_tokens:
+            chunks[-1]["end"] = end
+        else:
+            chunks.append({"start": start, "end": end})
+    for chunk in chunks:
+        chunk["text"] = text[chunk["start"]:chunk["end"]].strip()
+    return [chunk for chunk in chunks if chunk["text"]]
+
+
+def select_passages(text: str, query: str, token_budget: int = 1500, k: int = 8, max_tokens: int = 200) -> List[dict]:
+    """
+    Picks the passages of a text most relevant to a query, within a token budget.
+
+    Passages are ranked with BM25 against the query; the best ones are taken until
+    `k` passages or `token_budget` tokens are reached, then returned in document
+    order so the excerpt still reads naturally.
+
+    Args:
+        text (str): The text to select from (e.g. an extracted webpage).
+        query (str): What the passages should be relevant to.
+        token_budget (int, optional): Maximum total tokens of the returned passages.
+        k (int, optional): Maximum number of passages.
+        max_tokens (int, optional): Maximum size of a passage.
+
+    Returns:
+        list: Dictionaries with 'start', 'end', 'text' and 'score', sorted by 'start'.
+    """
+    chunks = chunk_text(text, max_tokens=max_tokens)
+    if not chunks:
+        return []
+    scores = bm25_scores(query, [chunk["text"] for chunk in chunks])
+    # Ties (e.g. no query term matched) keep the earliest passages first
+    order = np.lexsort((np.arange(len(chunks)), -scores))
+
+    selected, used = [], 0
+    for i in order:
+        tokens = count_tokens(chunks[i]["text"])
+        if used + tokens > token_budget:
+            continue
+        selected.append(dict(chunks[i], score=float(scores[i])))
+        used += tokens
+        if len(selected) >= k:
+            break
+    return sorted(selected, key=lambda chunk: chunk["start"])
+
+
+def format_passages(passages: List[dict]) -> str:
+    """Renders selected passages with their character offsets, for traceability in prompts."""
+    return "\n\n".join(f"[chars {p['start']}-{p['end']}]\n{p['text']}" for p in passages)
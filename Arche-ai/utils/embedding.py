@@ -0,0 +1,69 @@
+import re
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+from utils.bm25 import tokenize
+
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder: words and character n-grams are hashed into a fixed
+    number of signed buckets (the "hashing trick"), weighted by 1 + log(count) and
+    L2-normalized, so the dot product of two embeddings is their cosine similarity.
+
+    The hash is stable across processes (CRC32), so embeddings can be stored on disk.
+    Character n-grams make it tolerant to inflections and spelling ("weather" / "weathers",
+    "stock_price" / "stocks prices"), which plain keyword matching is not.
+    """
+
+    def __init__(self, dim: int = 1024, ngram_range: tuple = (3, 5), char_weight: float = 0.5):
+        """
+        Initializes the embedder.
+
+        Args:
+            dim (int, optional): Number of dimensions.
+            ngram_range (tuple, optional): Smallest and largest character n-gram length. None disables n-grams.
+            char_weight (float, optional): Weight of a character n-gram relative to a whole word.
+        """
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.char_weight = char_weight
+
+    def features(self, text: str) -> dict:
+        """Returns the weighted features of a text (identifiers like `getStockPrice` are split first)."""
+        features = {}
+        for word in tokenize(_CAMEL.sub(" ", text.replace("_", " "))):
+            features[f"w:{word}"] = features.get(f"w:{word}", 0.0) + 1.0
+            if self.ngram_range:
+                padded = f"<{word}>"
+                low, high = self.ngram_range
+                for n in range(low, min(high, len(padded)) + 1):
+                    for i in range(len(padded) - n + 1):
+                        gram = f"c:{padded[i:i + n]}"
+                        features[gram] = features.get(gram, 0.0) + self.char_weight
+        return features
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in self.features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            weight = 1.0 + np.log(count) if count >= 1.0 else count
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embeds texts.
+
+        Returns:
+            numpy.ndarray: A (len(texts), dim) float32 matrix of unit-length rows (zero rows for empty texts).
+        """
+        vectors = [self.embed_one(text) for text in texts]
+        if not vectors:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(vectors)
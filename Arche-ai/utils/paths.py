@@ -0,0 +1,24 @@
+import os
+import sys
+
+
+def user_cache_dir(*parts: str) -> str:
+    """
+    Returns a path under the per-user cache directory of Arche-ai, outside the source
+    tree: `$ARCHE_CACHE_DIR` if set, otherwise the platform's cache location
+    (`%LOCALAPPDATA%` on Windows, `~/Library/Caches` on macOS, `$XDG_CACHE_HOME` or
+    `~/.cache` elsewhere). Nothing is created.
+
+    Args:
+        *parts (str): Path components appended to the cache directory.
+    """
+    root = os.environ.get("ARCHE_CACHE_DIR")
+    if not root:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+        elif sys.platform == "darwin":
+            base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+        root = os.path.join(base, "arche-ai")
+    return os.path.join(root, *parts)
@@ -0,0 +1,76 @@
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls.
+
+    While a call for a key is in flight, later callers with the same key wait
+    for its result (or exception) instead of starting a duplicate call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `fn(*args, **kwargs)` unless a call with the same key is already in flight.
+
+        Args:
+            key (Hashable): Identifies identical calls.
+            fn (Callable): The function to call.
+
+        Returns:
+            Any: The result of the (possibly shared) call. Exceptions are re-raised for every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Returns the number of calls currently in flight."""
+        with self._lock:
+            return len(self._calls)
+
+    def metrics(self) -> dict:
+        """Returns how many calls were made and how many callers shared an in-flight call."""
+        with self._lock:
+            calls, shared = self.calls, self.shared
+        return {"calls": calls, "shared": shared, "in_flight": self.in_flight()}
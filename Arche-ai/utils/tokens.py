@@ -0,0 +1,79 @@
+import re
+
+_WORDS = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimates the number of LLM tokens in a text without a model-specific tokenizer.
+
+    Uses the larger of two common approximations (about 4 characters per token, and
+    about 0.75 words per token, i.e. words / 0.75 tokens, counting punctuation as words),
+    which errs on the side of overcounting for both prose and code.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, int(len(_WORDS.findall(text)) / 0.75)) + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts a text down to roughly `max_tokens` tokens, on a whitespace boundary when possible."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4]
+    while cut and count_tokens(cut) > max_tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+    space = cut.rfind(" ")
+    return cut[:space] if space > len(cut) // 2 else cut
+
+
+def _tail_to_tokens(text: str, max_tokens: int) -> str:
+    """Keeps roughly the last `max_tokens` tokens of a text."""
+    cut = text[-max_tokens * 4:] if max_tokens > 0 else ""
+    while cut and count_tokens(cut) > max_tokens:
+        cut = cut[len(cut) - int(len(cut) * 0.9):]
+    return cut
+
+
+def elide(text: str, max_tokens: int, head_ratio: float = 0.5) -> str:
+    """
+    Shortens a text to roughly `max_tokens` tokens by keeping its head and tail and
+    replacing the middle with an elision marker (whole lines when possible).
+
+    Args:
+        text (str): The text, e.g. a script output.
+        max_tokens (int): Token budget of the result.
+        head_ratio (float, optional): Share of the budget spent on the head. Defaults to 0.5.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(max_tokens - 12, 2)  # room for the marker
+    head_budget = int(budget * head_ratio)
+    tail_budget = budget - head_budget
+    lines = text.splitlines()
+
+    head, used = [], 0
+    for line in lines:
+        tokens = count_tokens(line)
+        if used + tokens > head_budget:
+            break
+        head.append(line)
+        used += tokens
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        tokens = count_tokens(line)
+        if used + tokens > tail_budget:
+            break
+        tail.append(line)
+        used += tokens
+    tail.reverse()
+
+    omitted = len(lines) - len(head) - len(tail)
+    if head or tail:
+        return "\n".join(head + [f"... [{omitted} lines omitted] ..."] + tail)
+    # A single huge line: cut on characters instead
+    head_text = truncate_to_tokens(text, head_budget)
+    tail_text = _tail_to_tokens(text, tail_budget)
+    # Word-dense text can make the two cuts overlap; the tail starts after the head
+    tail_text = tail_text[max(0, len(head_text) + len(tail_text) - len(text)):]
+    return f"{head_text} ... [{len(text) - len(head_text) - len(tail_text)} characters omitted] ... {tail_text}"